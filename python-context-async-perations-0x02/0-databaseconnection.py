@@ -1,17 +1,54 @@
 import sqlite3
 
+from connection_pool import get_async_pool, get_pool
+
 class DatabaseConnection:
-    def __init__(self, db_name):
+    """Connection to db_name for the duration of a with block.
+
+    By default a connection is opened in __enter__ and closed in __exit__.
+    With pooled=True a warm connection is checked out of the bounded pool
+    for db_name (connection_pool.get_pool; pool_options such as max_size,
+    max_uses and max_age apply when that pool is first created) and
+    returned to it afterwards. Either way, work not committed inside the
+    block is rolled back. "async with" gives an aiosqlite connection from
+    the event loop's pool for db_name.
+    """
+    def __init__(self, db_name, pooled=False, **pool_options):
         self.db_name = db_name
+        self.pooled = pooled
+        self.pool_options = pool_options
         self.conn = None
+        self._pool = None
 
     def __enter__(self):
-        self.conn = sqlite3.connect(self.db_name)
+        if self.pooled:
+            self._pool = get_pool(self.db_name, **self.pool_options)
+            self.conn = self._pool.checkout()
+        else:
+            self.conn = sqlite3.connect(self.db_name)
         return self.conn
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
-            self.conn.close()
+            if exc_type is not None and self.conn.in_transaction:
+                self.conn.rollback()
+            if self._pool is not None:
+                self._pool.checkin(self.conn)
+            else:
+                self.conn.close()
+            self.conn = self._pool = None
+
+    async def __aenter__(self):
+        self._pool = get_async_pool(self.db_name, **self.pool_options)
+        self.conn = await self._pool.checkout()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.conn:
+            if exc_type is not None and self.conn.in_transaction:
+                await self.conn.rollback()
+            await self._pool.checkin(self.conn)
+            self.conn = self._pool = None
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,18 +1,70 @@
+import re
 import sqlite3
 
+from batch_execute import select_batch
+from row_factories import make_row_builder
+
+_READ_QUERY = re.compile(r"^\s*(?:select|with|values)\b", re.IGNORECASE)
+
 class ExecuteQuery:
-    def __init__(self, query, params=None, db_path=":memory:"):
+    """Runs query on db_path for the duration of a with block.
+
+    By default the block receives the full result list. With lazy=True it
+    receives an iterator that fetches arraysize rows at a time, so memory
+    use stays constant however large the result is; the iterator is only
+    valid inside the block. row_factory shapes each row: None/"tuple",
+    "namedtuple", "record" (compact __slots__ objects), or a callable
+    taking (cursor, row).
+
+    param_sets runs the query once per parameter set on one connection:
+    a SELECT gives the block one list of rows per set, in order (answered
+    by a single IN (...) query when the query allows it, see
+    batch_execute); any other statement is applied with executemany in
+    one transaction and the block gets the total rowcount.
+    """
+    def __init__(self, query, params=None, db_path=":memory:", lazy=False, arraysize=1000,
+                 row_factory=None, param_sets=None):
+        if param_sets is not None and lazy:
+            raise ValueError("lazy is not supported together with param_sets")
         self.query = query
         self.params = params or ()
+        self.param_sets = param_sets
         self.db_path = db_path
+        self.lazy = lazy
+        self.arraysize = arraysize
+        self.row_factory = row_factory
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
         self.conn = sqlite3.connect(self.db_path)
+        if self.param_sets is not None:
+            return self._execute_batch()
         self.cursor = self.conn.cursor()
+        self.cursor.arraysize = self.arraysize
         self.cursor.execute(self.query, self.params)
-        return self.cursor.fetchall()
+        build = make_row_builder(self.row_factory, self.cursor) if self.cursor.description else None
+        if self.lazy:
+            return self._iter_rows(build)
+        rows = self.cursor.fetchall()
+        return rows if build is None else [build(row) for row in rows]
+
+    def _execute_batch(self):
+        if _READ_QUERY.match(self.query):
+            return select_batch(self.conn, self.query, self.param_sets, self.row_factory)
+        with self.conn:
+            self.cursor = self.conn.executemany(self.query, self.param_sets)
+        return self.cursor.rowcount
+
+    def _iter_rows(self, build):
+        while True:
+            rows = self.cursor.fetchmany()
+            if not rows:
+                return
+            if build is None:
+                yield from rows
+            else:
+                yield from map(build, rows)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.cursor:
@@ -22,4 +74,16 @@ class ExecuteQuery:
 
 # Example usage:
 # with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,), "your_database.db") as result:
-#     print(result)
\ No newline at end of file
+#     print(result)
+#
+# Many lookups with one connection (and here a single IN query):
+# with ExecuteQuery("SELECT * FROM users WHERE id = ?", db_path="your_database.db",
+#                   param_sets=[(1,), (2,), (3,)]) as results:
+#     for rows in results:
+#         print(rows)
+#
+# Streaming a large table a block at a time:
+# with ExecuteQuery("SELECT * FROM users", db_path="your_database.db", lazy=True,
+#                   row_factory="namedtuple") as rows:
+#     for user in rows:
+#         print(user.name)
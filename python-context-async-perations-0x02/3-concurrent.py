@@ -1,19 +1,18 @@
 import asyncio
-import aiosqlite
+
+from connection_pool import close_async_pools
+from query_router import get_router
 
 DB_PATH = "users.db"
+# Read-only copies of DB_PATH (e.g. kept fresh with query_router.copy_database);
+# reads are spread over them, writes always go to DB_PATH
+REPLICA_PATHS = ()
 
 async def async_fetch_users():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            users = await cursor.fetchall()
-            return users
+    return await get_router(DB_PATH, REPLICA_PATHS).fetchall("SELECT * FROM users")
 
 async def async_fetch_older_users():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
-            older_users = await cursor.fetchall()
-            return older_users
+    return await get_router(DB_PATH, REPLICA_PATHS).fetchall("SELECT * FROM users WHERE age > ?", (40,))
 
 async def fetch_concurrently():
     users, older_users = await asyncio.gather(
@@ -22,6 +21,7 @@ async def fetch_concurrently():
     )
     print("All users:", users)
     print("Users older than 40:", older_users)
+    await close_async_pools()
 
 if __name__ == "__main__":
     asyncio.run(fetch_concurrently())
\ No newline at end of file
@@ -0,0 +1,97 @@
+import re
+
+from row_factories import make_row_builder
+
+# SELECT <columns> FROM <source> WHERE <condition> [ORDER BY ...]
+_SIMPLE_SELECT = re.compile(
+    r"^\s*select\s+(?P<columns>.+?)\s+from\s+(?P<source>.+?)\s+where\s+(?P<where>.+?)"
+    r"(?P<order>\s+order\s+by\s+.+?)?\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+# A WHERE clause made only of top-level AND-ed predicates
+_NOT_CONJUNCTIVE = re.compile(r"[()]|\b(?:or|not|case|where|select)\b", re.IGNORECASE)
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+_KEY_PREDICATE = re.compile(r"^\s*(?P<column>[A-Za-z_][\w.]*)\s*=\s*\?\s*$")
+# Anything that makes "one IN query" differ from "one query per key"
+_NOT_REWRITABLE = re.compile(
+    r"\b(?:limit|offset|group\s+by|having|distinct|union|intersect|except|"
+    r"count|sum|avg|min|max|total|group_concat|over)\b", re.IGNORECASE)
+
+_BATCH_KEY = "__batch_key"
+
+
+def rewrite_as_in(query, count):
+    """Rewrites "SELECT cols FROM t WHERE key = ?" to fetch count keys at once.
+
+    Returns the rewritten SQL, which selects the key first as __batch_key
+    and matches "key IN (?, ?, ...)", or None when the query is not that
+    simple: it must have exactly one placeholder, and the WHERE clause
+    must be "column = ?" alone or AND-ed with other predicates (no OR,
+    NOT or parentheses, which could make rows match without the key).
+    Nothing whose meaning changes when several keys share one query
+    (LIMIT, aggregates, DISTINCT...) is allowed either.
+    """
+    match = _SIMPLE_SELECT.match(query)
+    if match is None or query.count("?") != 1 or _NOT_REWRITABLE.search(query):
+        return None
+    if _NOT_CONJUNCTIVE.search(match.group("source")) or _NOT_CONJUNCTIVE.search(match.group("where")):
+        return None
+    predicates = _AND.split(match.group("where"))
+    for index, predicate in enumerate(predicates):
+        key = _KEY_PREDICATE.match(predicate)
+        if key is not None:
+            break
+    else:
+        return None
+    column = key.group("column")
+    predicates[index] = f"{column} IN ({', '.join('?' * count)})"
+    return (f"SELECT {column} AS {_BATCH_KEY}, {match.group('columns')} FROM {match.group('source')} "
+            f"WHERE {' AND '.join(predicates)}{match.group('order') or ''}")
+
+
+class _Columns:
+    """Cursor stand-in exposing the description without the __batch_key column."""
+
+    def __init__(self, cursor):
+        self.description = cursor.description[1:]
+
+
+def select_batch(conn, query, param_sets, row_factory=None, rewrite=True):
+    """Runs a SELECT once per parameter set; returns one list of rows per set, in order.
+
+    When the query allows it (see rewrite_as_in) and every key is an int
+    or str, all sets are answered by a single IN (...) query and the rows
+    are grouped by key. Keys that got no rows that way (no match, or a
+    value sqlite matched only after type conversion, e.g. '7' against an
+    INTEGER column) are looked up one by one, so the result is always
+    the same as running the query per set. Otherwise the statement runs
+    once per set on the same connection, so it is parsed only once.
+    """
+    param_sets = [tuple(params) for params in param_sets]
+    cursor = conn.cursor()
+    grouped = {}
+    sql = None
+    if rewrite and param_sets and all(len(params) == 1 and type(params[0]) in (int, str)
+                                      for params in param_sets):
+        distinct = list(dict.fromkeys(params[0] for params in param_sets))
+        sql = rewrite_as_in(query, len(distinct))
+
+    if sql is not None:
+        cursor.execute(sql, distinct)
+        build = make_row_builder(row_factory, _Columns(cursor))
+        for row in cursor:
+            key, row = row[0], row[1:]
+            grouped.setdefault(key, []).append(row if build is None else build(row))
+
+    build = None
+    described = False
+    results = []
+    for params in param_sets:
+        if sql is not None and params[0] in grouped:
+            results.append(list(grouped[params[0]]))
+            continue
+        cursor.execute(query, params)
+        if not described:
+            build = make_row_builder(row_factory, cursor)
+            described = True
+        rows = cursor.fetchall()
+        results.append(rows if build is None else [build(row) for row in rows])
+    return results
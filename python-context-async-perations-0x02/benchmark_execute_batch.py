@@ -0,0 +1,98 @@
+"""Batched ExecuteQuery vs one ExecuteQuery per parameter set.
+
+Builds a throwaway users table, then answers the same list of id lookups
+by looping over ExecuteQuery (a connection per lookup), with
+param_sets and the IN rewrite, and with param_sets forced to run the
+statement per set on one connection. Also times an UPDATE batch against
+committing each row on its own connection.
+
+Usage: python benchmark_execute_batch.py [--rows N] [--lookups N] [--updates N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import batch_execute
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+
+
+def make_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                     ((f"user{i}", f"user{i}@example.com", 18 + i % 60) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {count:>7} sets {elapsed:>8.3f}s {count / elapsed:>10.0f} sets/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=500)
+    # Each committed UPDATE costs an fsync, so keep this one small
+    parser.add_argument("--updates", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        make_database(db_path, args.rows)
+        query = "SELECT * FROM users WHERE id = ?"
+        param_sets = [(random.randint(1, args.rows),) for _ in range(args.lookups)]
+
+        def looped():
+            results = []
+            for params in param_sets:
+                with ExecuteQuery(query, params, db_path) as rows:
+                    results.append(rows)
+            return results
+
+        def batched():
+            with ExecuteQuery(query, db_path=db_path, param_sets=param_sets) as results:
+                return results
+
+        def batched_without_rewrite():
+            conn = sqlite3.connect(db_path)
+            try:
+                return batch_execute.select_batch(conn, query, param_sets, rewrite=False)
+            finally:
+                conn.close()
+
+        expected = timed("SELECT, ExecuteQuery loop", looped, len(param_sets))
+        assert timed("SELECT, param_sets (IN)", batched, len(param_sets)) == expected
+        assert timed("SELECT, param_sets (per set)", batched_without_rewrite, len(param_sets)) == expected
+
+        update = "UPDATE users SET email = ? WHERE id = ?"
+        updates = [(f"new{i}@example.com", params[0]) for i, params in enumerate(param_sets[:args.updates])]
+
+        def batched_updates():
+            # Fresh values, so the batch really changes every row again
+            changes = [(f"batch-{email}", user_id) for email, user_id in updates]
+            with ExecuteQuery(update, db_path=db_path, param_sets=changes) as rowcount:
+                return rowcount
+
+        # ExecuteQuery never commits a single statement, so commit as a caller would
+        def looped_committed():
+            for params in updates:
+                conn = sqlite3.connect(db_path)
+                with conn:
+                    conn.execute(update, params)
+                conn.close()
+
+        timed("UPDATE, committed per row", looped_committed, len(updates))
+        timed("UPDATE, param_sets", batched_updates, len(updates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+import aiosqlite
+
+
+class _Pooled:
+    """A pooled connection and the bookkeeping used to decide when to recycle it."""
+
+    __slots__ = ("conn", "created", "uses")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+def _recycle(pool, pooled):
+    """True when pooled has reached pool.max_uses checkouts or pool.max_age seconds."""
+    return ((pool.max_uses is not None and pooled.uses >= pool.max_uses) or
+            (pool.max_age is not None and time.monotonic() - pooled.created >= pool.max_age))
+
+
+class ConnectionPool:
+    """Bounded pool of sqlite3 connections to one database file.
+
+    Connections are opened lazily up to max_size and reused warm, most
+    recently used first. A connection is closed instead of reused after
+    max_uses checkouts or once it is max_age seconds old, whether that
+    age is reached in use or while idle (either limit may be None). Uncommitted work is rolled back on checkin, exactly as
+    closing the connection would discard it.
+    """
+
+    def __init__(self, db_name, max_size=5, max_uses=1000, max_age=300.0, timeout=10.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._checked_out = {}      # id(conn) -> _Pooled
+
+    def checkout(self):
+        with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    if _recycle(self, pooled):
+                        # Aged out while idle: close it and free its slot
+                        pooled.conn.close()
+                        self._size -= 1
+                        continue
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                if not self._cond.wait(self.timeout):
+                    raise TimeoutError(f"No connection to {self.db_name} free after {self.timeout}s")
+        if pooled is None:
+            try:
+                # Handed between threads with each checkout, never used concurrently
+                pooled = _Pooled(sqlite3.connect(self.db_name, check_same_thread=False))
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        pooled.uses += 1
+        with self._cond:
+            self._checked_out[id(pooled.conn)] = pooled
+        return pooled.conn
+
+    def checkin(self, conn):
+        with self._cond:
+            pooled = self._checked_out.pop(id(conn))
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = not _recycle(self, pooled)
+        except sqlite3.Error:
+            reusable = False
+        with self._cond:
+            if reusable:
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+                conn.close()
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            for pooled in self._idle:
+                pooled.conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+
+
+class AsyncConnectionPool:
+    """aiosqlite version of ConnectionPool, for use inside one event loop."""
+
+    def __init__(self, db_name, max_size=5, max_uses=1000, max_age=300.0, timeout=10.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.timeout = timeout
+        self._cond = asyncio.Condition()
+        self._idle = []
+        self._size = 0
+        self._checked_out = {}
+
+    async def checkout(self):
+        expired = []
+        async with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    if _recycle(self, pooled):
+                        # Aged out while idle: free its slot, close it below
+                        expired.append(pooled.conn)
+                        self._size -= 1
+                        continue
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), self.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"No connection to {self.db_name} free after {self.timeout}s") from None
+        for conn in expired:
+            await conn.close()
+        if pooled is None:
+            try:
+                pooled = _Pooled(await aiosqlite.connect(self.db_name))
+            except BaseException:
+                async with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        pooled.uses += 1
+        self._checked_out[id(pooled.conn)] = pooled
+        return pooled.conn
+
+    async def checkin(self, conn):
+        """Returns conn to the pool (or closes it when due for recycling).
+
+        Runs to completion even if the caller is cancelled meanwhile (e.g. a
+        wait_for timeout landing during the rollback), so a slot is never lost.
+        """
+        await asyncio.shield(self._checkin(conn))
+
+    async def _checkin(self, conn):
+        pooled = self._checked_out.pop(id(conn))
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            reusable = not _recycle(self, pooled)
+        except sqlite3.Error:
+            reusable = False
+        if not reusable:
+            await conn.close()
+        async with self._cond:
+            if reusable:
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+    async def discard(self, conn):
+        """Closes a checked-out connection instead of returning it, freeing its slot.
+
+        Like checkin(), completes even if the caller is cancelled.
+        """
+        await asyncio.shield(self._discard(conn))
+
+    async def _discard(self, conn):
+        self._checked_out.pop(id(conn), None)
+        try:
+            await conn.close()
+        except sqlite3.Error:
+            # e.g. still "interrupted"; the connection is dropped either way
+            pass
+        finally:
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    async def close(self):
+        async with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for pooled in idle:
+            await pooled.conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# event loop -> {db file -> AsyncConnectionPool}
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def _pool_key(db_name):
+    return db_name if db_name == ":memory:" else os.path.abspath(db_name)
+
+
+def get_pool(db_name, **options):
+    """Returns the process-wide pool for db_name; options apply when it is first created."""
+    key = _pool_key(db_name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_name, **options)
+        return pool
+
+
+def get_async_pool(db_name, **options):
+    """Returns the pool for db_name in the running event loop; options apply when it is first created."""
+    pools = _async_pools.setdefault(asyncio.get_running_loop(), {})
+    key = _pool_key(db_name)
+    pool = pools.get(key)
+    if pool is None:
+        pool = pools[key] = AsyncConnectionPool(db_name, **options)
+    return pool
+
+
+async def close_async_pools():
+    """Closes every pool created in the running event loop."""
+    for pool in _async_pools.pop(asyncio.get_running_loop(), {}).values():
+        await pool.close()
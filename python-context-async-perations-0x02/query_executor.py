@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import weakref
+
+from connection_pool import get_async_pool
+
+# Priority lanes: lower runs first when queries are waiting for a slot
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+
+class PrioritySemaphore:
+    """asyncio semaphore whose waiters are woken lowest priority value first (FIFO within a lane)."""
+
+    def __init__(self, limit):
+        self._free = limit
+        self._waiters = []          # heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+
+    def waiting(self):
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority=NORMAL):
+        if self._free > 0 and not self.waiting():
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Handed a slot just as we were cancelled: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            # Waiters cancelled while queued are skipped
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+
+class AsyncQueryExecutor:
+    """Runs queries on a shared aiosqlite pool with bounded concurrency.
+
+    At most max_concurrency queries hold a connection at once; the rest
+    wait in priority lanes (INTERACTIVE, NORMAL, BACKGROUND) and are
+    admitted lowest lane first. timeout bounds a query's whole life,
+    waiting included. A query that times out or whose task is cancelled
+    gets its running statement interrupted and its connection closed (the
+    pool opens a fresh one when needed).
+    """
+
+    def __init__(self, db_path, max_concurrency=8, default_timeout=None):
+        self.db_path = db_path
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self._pool = get_async_pool(db_path, max_size=max_concurrency)
+        self._slots = PrioritySemaphore(max_concurrency)
+        self.stats = dict.fromkeys(("completed", "failed", "timed_out", "cancelled"), 0)
+
+    async def fetchall(self, query, params=(), *, priority=NORMAL, timeout=None):
+        return await self._submit(self._fetchall, query, params, priority, timeout)
+
+    async def fetchone(self, query, params=(), *, priority=NORMAL, timeout=None):
+        return await self._submit(self._fetchone, query, params, priority, timeout)
+
+    async def execute(self, query, params=(), *, priority=NORMAL, timeout=None):
+        """Runs a write and commits it; returns the rowcount."""
+        return await self._submit(self._execute, query, params, priority, timeout)
+
+    async def _submit(self, operation, query, params, priority, timeout):
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            result = await asyncio.wait_for(self._run(operation, query, params, priority), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            raise
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        self.stats["completed"] += 1
+        return result
+
+    async def _run(self, operation, query, params, priority):
+        await self._slots.acquire(priority)
+        try:
+            conn = await self._pool.checkout()
+            try:
+                result = await operation(conn, query, params)
+            except asyncio.CancelledError:
+                # Stop the statement still running on the connection's thread. The
+                # interrupt stays armed until that statement is finalized, so the
+                # connection is closed rather than handed to the next query.
+                await conn.interrupt()
+                await self._pool.discard(conn)
+                raise
+            except BaseException:
+                await self._pool.checkin(conn)
+                raise
+            await self._pool.checkin(conn)
+            return result
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    async def _fetchall(conn, query, params):
+        async with conn.execute(query, params) as cursor:
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def _fetchone(conn, query, params):
+        async with conn.execute(query, params) as cursor:
+            return await cursor.fetchone()
+
+    @staticmethod
+    async def _execute(conn, query, params):
+        async with conn.execute(query, params) as cursor:
+            rowcount = cursor.rowcount
+        await conn.commit()
+        return rowcount
+
+    def waiting(self):
+        return self._slots.waiting()
+
+
+# event loop -> {db path -> executor}
+_executors = weakref.WeakKeyDictionary()
+
+
+def get_executor(db_path, **options):
+    """Returns the executor for db_path in the running event loop; options apply when it is first created."""
+    executors = _executors.setdefault(asyncio.get_running_loop(), {})
+    executor = executors.get(db_path)
+    if executor is None:
+        executor = executors[db_path] = AsyncQueryExecutor(db_path, **options)
+    return executor
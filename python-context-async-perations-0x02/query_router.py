@@ -0,0 +1,136 @@
+import asyncio
+import re
+import sqlite3
+import weakref
+
+from query_executor import NORMAL, get_executor
+
+_READ_ONLY = re.compile(r"^\s*(?:select|with|values|explain)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(?:insert|update|delete|replace|create|drop|alter)\b", re.IGNORECASE)
+
+
+def is_read_only(query):
+    """True for statements that can be served by a replica (plain SELECTs, CTEs without writes)."""
+    return bool(_READ_ONLY.match(query)) and not _WRITE_KEYWORD.search(query)
+
+
+def copy_database(source_path, replica_path):
+    """Refreshes replica_path with a consistent snapshot of source_path (sqlite backup API).
+
+    Local copies made this way stand in for real replicas.
+    """
+    source = sqlite3.connect(source_path)
+    replica = sqlite3.connect(replica_path)
+    try:
+        source.backup(replica)
+    finally:
+        replica.close()
+        source.close()
+
+
+class QueryRouter:
+    """Sends writes to the primary database and spreads reads over replicas.
+
+    Each database file gets its own AsyncQueryExecutor. A read goes to
+    the replica with the fewest queries in flight (the primary when there
+    are no replicas); statements that are not read-only always go to the
+    primary. Replicas may lag the primary, so pass on_primary=True for
+    reads that must see your own writes.
+
+    Hedged reads (hedge=True) send the query to a second replica as well
+    if the first has not answered within hedge_delay seconds (0 sends both
+    at once), take whichever result arrives first and cancel the other.
+    A cancelled attempt whose statement is still running is interrupted
+    and its connection closed, so the delay should stay near the usual p95
+    latency: hedging then trims the tail without costing most reads a
+    reconnect.
+    """
+
+    def __init__(self, primary, replicas=(), max_concurrency=8, hedge=False, hedge_delay=0.01):
+        self.primary = get_executor(primary, max_concurrency=max_concurrency)
+        self.replicas = [get_executor(path, max_concurrency=max_concurrency) for path in replicas]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self._in_flight = {}
+        self.stats = dict.fromkeys(("reads", "writes", "hedged", "hedge_wins"), 0)
+
+    def _pick(self, exclude=None):
+        candidates = [executor for executor in self.replicas if executor is not exclude]
+        if not candidates:
+            return self.primary if exclude is not self.primary else None
+        return min(candidates, key=lambda executor: self._in_flight.get(executor, 0))
+
+    async def _on(self, executor, method, query, params, priority, timeout):
+        self._in_flight[executor] = self._in_flight.get(executor, 0) + 1
+        try:
+            return await getattr(executor, method)(query, params, priority=priority, timeout=timeout)
+        finally:
+            self._in_flight[executor] -= 1
+
+    async def fetchall(self, query, params=(), *, priority=NORMAL, timeout=None, hedge=None,
+                       on_primary=False):
+        return await self._read("fetchall", query, params, priority, timeout, hedge, on_primary)
+
+    async def fetchone(self, query, params=(), *, priority=NORMAL, timeout=None, hedge=None,
+                       on_primary=False):
+        return await self._read("fetchone", query, params, priority, timeout, hedge, on_primary)
+
+    async def execute(self, query, params=(), *, priority=NORMAL, timeout=None):
+        """Runs a write on the primary and commits it; returns the rowcount."""
+        self.stats["writes"] += 1
+        return await self._on(self.primary, "execute", query, params, priority, timeout)
+
+    async def _read(self, method, query, params, priority, timeout, hedge, on_primary):
+        if on_primary or not is_read_only(query):
+            return await self._on(self.primary, method, query, params, priority, timeout)
+        self.stats["reads"] += 1
+        first = self._pick()
+        second = self._pick(exclude=first) if (self.hedge if hedge is None else hedge) else None
+        if second is None or second is self.primary:
+            return await self._on(first, method, query, params, priority, timeout)
+        return await self._hedged(first, second, method, query, params, priority, timeout)
+
+    async def _hedged(self, first, second, method, query, params, priority, timeout):
+        first_task = asyncio.ensure_future(self._on(first, method, query, params, priority, timeout))
+        tasks = [first_task]
+        try:
+            if self.hedge_delay:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+                # A first attempt that failed is hedged like a slow one
+                if done and first_task.exception() is None:
+                    return first_task.result()
+            self.stats["hedged"] += 1
+            tasks.append(asyncio.ensure_future(self._on(second, method, query, params, priority, timeout)))
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first_task:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            # Both attempts failed
+            raise error
+        finally:
+            # An attempt that already finished has returned its connection normally
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # Let the losers clean up (and _in_flight settle) before returning
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# event loop -> {(primary, replicas) -> router}
+_routers = weakref.WeakKeyDictionary()
+
+
+def get_router(primary, replicas=(), **options):
+    """Returns the router for primary and replicas in the running event loop; options apply on first use."""
+    routers = _routers.setdefault(asyncio.get_running_loop(), {})
+    key = (primary, tuple(replicas))
+    router = routers.get(key)
+    if router is None:
+        router = routers[key] = QueryRouter(primary, replicas, **options)
+    return router
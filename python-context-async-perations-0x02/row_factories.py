@@ -0,0 +1,61 @@
+from collections import namedtuple
+
+
+def column_names(cursor):
+    return [column[0] for column in cursor.description]
+
+
+def namedtuple_factory(cursor):
+    """Builds rows as namedtuples whose fields are the result's column names."""
+    # rename=True turns names like "COUNT(*)" into positional _0, _1, ...
+    Row = namedtuple("Row", column_names(cursor), rename=True)
+    return Row._make
+
+
+def record_class(fields):
+    """A compact __slots__ class with one attribute per field (no per-row __dict__)."""
+    def __init__(self, *values):
+        for name, value in zip(fields, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in fields)
+
+    def __repr__(self):
+        return "Record(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in fields) + ")"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and tuple(self) == tuple(other)
+
+    return type("Record", (), {"__slots__": tuple(fields), "__init__": __init__, "__iter__": __iter__,
+                               "__repr__": __repr__, "__eq__": __eq__, "__hash__": None})
+
+
+def record_factory(cursor):
+    """Builds rows as slotted Record objects (see record_class)."""
+    fields = namedtuple("Row", column_names(cursor), rename=True)._fields
+    cls = record_class(fields)
+    return lambda row: cls(*row)
+
+
+# row_factory names accepted by ExecuteQuery; None/"tuple" keep sqlite3's tuples
+ROW_FACTORIES = {
+    "namedtuple": namedtuple_factory,
+    "record": record_factory,
+}
+
+
+def make_row_builder(row_factory, cursor):
+    """Resolves an ExecuteQuery row_factory for an executed cursor.
+
+    Returns None for plain tuples, otherwise a function applied to each
+    row. row_factory is None, "tuple", "namedtuple", "record", or a
+    callable taking (cursor, row) like sqlite3's Connection.row_factory.
+    """
+    if row_factory is None or row_factory == "tuple":
+        return None
+    if callable(row_factory):
+        return lambda row: row_factory(cursor, row)
+    if row_factory not in ROW_FACTORIES:
+        raise ValueError(f"row_factory must be a callable or one of {['tuple', *ROW_FACTORIES]}")
+    return ROW_FACTORIES[row_factory](cursor)
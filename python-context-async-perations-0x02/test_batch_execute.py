@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Unit tests for batch_execute.rewrite_as_in and select_batch."""
+
+import sqlite3
+import unittest
+
+from batch_execute import rewrite_as_in, select_batch
+
+
+class TestRewriteAsIn(unittest.TestCase):
+    """Only WHERE clauses that are plain conjunctions around the key are rewritten."""
+
+    def test_rewritten(self):
+        cases = [
+            ("SELECT * FROM users WHERE id = ?",
+             "SELECT id AS __batch_key, * FROM users WHERE id IN (?, ?)"),
+            ("SELECT name FROM users WHERE age > 30 AND id = ? ORDER BY name",
+             "SELECT id AS __batch_key, name FROM users WHERE age > 30 AND id IN (?, ?) ORDER BY name"),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(rewrite_as_in(query, 2), expected)
+
+    def test_not_rewritten(self):
+        for query in ("SELECT * FROM users WHERE age = 30 OR id = ?",
+                      "SELECT * FROM users WHERE NOT id = ?",
+                      "SELECT * FROM users WHERE age = 30 AND NOT id = ?",
+                      "SELECT * FROM users WHERE (age = 30 OR age = 40) AND id = ?",
+                      "SELECT * FROM users WHERE id = ? LIMIT 1",
+                      "SELECT * FROM users WHERE id > ?"):
+            with self.subTest(query=query):
+                self.assertIsNone(rewrite_as_in(query, 2))
+
+
+class TestSelectBatch(unittest.TestCase):
+    """select_batch returns what running the query once per set returns."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)")
+        self.conn.executemany("INSERT INTO users VALUES (?, ?, ?)",
+                              [(1, "a", 30), (2, "b", 40), (3, "c", 30), (4, "d", 50)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_matches_per_set(self):
+        param_sets = [(2,), (4,), (1,), (7,)]
+        for query in ("SELECT * FROM users WHERE id = ?",
+                      "SELECT * FROM users WHERE age = 30 OR id = ?",
+                      "SELECT * FROM users WHERE NOT id = ?",
+                      "SELECT * FROM users WHERE age = 30 AND id = ?"):
+            with self.subTest(query=query):
+                expected = [self.conn.execute(query, params).fetchall() for params in param_sets]
+                self.assertEqual(select_batch(self.conn, query, param_sets), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
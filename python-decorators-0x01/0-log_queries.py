@@ -1,18 +1,25 @@
 import sqlite3
-import functools
 
-def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Try to get the query argument from args or kwargs
-        query = None
-        if 'query' in kwargs:
-            query = kwargs['query']
-        elif len(args) > 0:
-            query = args[0]
-        print(f"Executing SQL Query: {query}")
-        return func(*args, **kwargs)
-    return wrapper
+from query_profiler import QueryProfiler, profile_queries
+
+# Shared by every log_queries-decorated function; default_profiler.report()
+# lists the slowest query fingerprints
+default_profiler = QueryProfiler()
+
+def log_queries(func=None, *, profiler=None):
+    """Logs and profiles the query passed to the decorated function.
+
+    Each call records its latency and row count under the query's
+    fingerprint (literals stripped) and emits a log record, subject to the
+    profiler's sampling, through a queue-backed handler. Usable bare or as
+    @log_queries(profiler=QueryProfiler(sample_rate=0.01)).
+    Overhead budget: 10us per call with 1% of calls logged; measured at
+    under 1us, against about 11us when every call is logged (see
+    benchmark_log_queries.py). Sample in production.
+    """
+    if func is None:
+        return lambda f: log_queries(f, profiler=profiler)
+    return profile_queries(func, default_profiler if profiler is None else profiler)
 
 @log_queries
 def fetch_all_users(query):
@@ -1,8 +1,43 @@
 import sqlite3
 import functools
+import inspect
+
+from db_pool import with_pooled_connection
+
+def with_db_connection(func=None, *, pooled=False):
+    """Decorator to handle opening and closing a database connection.
+
+    With @with_db_connection(pooled=True) the connection comes from a shared
+    pool instead and stays open (with its PRAGMAs and statement cache)
+    between calls. Coroutine functions are given an aiosqlite connection
+    and awaited, so the event loop is never blocked on the database.
+    Generator functions (see streaming.stream_rows) keep their connection
+    until the generator is exhausted or closed.
+    """
+    if func is None:
+        return lambda f: with_db_connection(f, pooled=pooled)
+    if pooled:
+        return with_pooled_connection('my_database.db')(func)
+
+    if inspect.iscoroutinefunction(func):
+        import aiosqlite
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with aiosqlite.connect('my_database.db') as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(*args, **kwargs):
+            conn = sqlite3.connect('my_database.db')
+            try:
+                yield from func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return stream_wrapper
 
-def with_db_connection(func):
-    """Decorator to handle opening and closing a database connection."""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect('my_database.db')
@@ -1,7 +1,29 @@
 import sqlite3
 import functools
+import inspect
+
+from cache_layer import invalidate_tables, track_async_writes, track_writes
 
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        import aiosqlite
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with aiosqlite.connect('my_database.db') as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(*args, **kwargs):
+            conn = sqlite3.connect('my_database.db')
+            try:
+                yield from func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return stream_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect('my_database.db')
@@ -11,16 +33,56 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-def transactional(func):
+def transactional(func=None, *, group_commit=None):
+    """Runs the decorated function in a transaction: commit on success, rollback on error.
+
+    With @transactional(group_commit=GroupCommitter(db_path)) the function
+    is no longer given the caller's connection: each call is queued on the
+    committer and applied, under its own savepoint, in a transaction shared
+    with other calls arriving in the same window. The call blocks until
+    that transaction commits; func.submit(...) returns a Future instead, so
+    a single thread can queue many writes into one commit.
+
+    Coroutine functions are given an aiosqlite connection and committed or
+    rolled back with await.
+    """
+    if func is None:
+        return lambda f: transactional(f, group_commit=group_commit)
+    if group_commit is not None:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError("group_commit runs operations on its writer thread; use a plain function")
+        @functools.wraps(func)
+        def grouped(*args, **kwargs):
+            return group_commit.call(func, *args, **kwargs)
+        grouped.submit = functools.partial(group_commit.submit, func)
+        return grouped
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            try:
+                async with track_async_writes(conn) as written:
+                    result = await func(conn, *args, **kwargs)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            invalidate_tables(written)
+            return result
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         try:
-            result = func(conn, *args, **kwargs)
+            with track_writes(conn) as written:
+                result = func(conn, *args, **kwargs)
             conn.commit()
-            return result
         except Exception:
             conn.rollback()
             raise
+        # Cached results read from the tables we just changed are now stale
+        invalidate_tables(written)
+        return result
     return wrapper
 
 @with_db_connection
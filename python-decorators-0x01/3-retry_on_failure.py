@@ -1,34 +1,139 @@
 import time
+import asyncio
 import sqlite3
 import functools
+import inspect
+
+from retry_policy import backoff_delay, retry_classifier
+
+# Sample table and data for the in-memory demonstration database
+SAMPLE_DATA = (
+    "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT)",
+    "INSERT INTO users (name) VALUES ('Alice'), ('Bob')",
+)
 
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        import aiosqlite
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with aiosqlite.connect(':memory:') as conn:
+                for statement in SAMPLE_DATA:
+                    await conn.execute(statement)
+                await conn.commit()
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
+    def connect():
+        conn = sqlite3.connect(':memory:')  # For demonstration, use in-memory DB
+        for statement in SAMPLE_DATA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(*args, **kwargs):
+            conn = connect()
+            try:
+                yield from func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return stream_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect(':memory:')  # For demonstration, use in-memory DB
+        conn = connect()
         try:
-            # Create a sample table and insert data for demonstration
-            conn.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT)")
-            conn.execute("INSERT INTO users (name) VALUES ('Alice'), ('Bob')")
-            conn.commit()
             return func(conn, *args, **kwargs)
         finally:
             conn.close()
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, backoff=2.0, max_delay=30.0, jitter=True,
+                     retry_on=None, budget=None, breaker=None):
+    """Retries transient failures with exponential backoff.
+
+    retries     total attempts, including the first
+    delay       base delay in seconds; attempt n waits up to delay * backoff**n,
+                capped at max_delay (backoff=1, jitter=False gives fixed delays)
+    jitter      draw each wait uniformly from [0, that delay]
+    retry_on    predicate or exception class(es) deciding what is retryable;
+                defaults to retry_policy.is_transient_error (e.g. sqlite
+                "database is locked"), so other errors are raised at once
+    budget      optional retry_policy.RetryBudget shared between functions
+    breaker     optional retry_policy.CircuitBreaker; while open, calls fail
+                fast with CircuitOpenError
+
+    Works on plain functions and coroutine functions (waiting with asyncio.sleep).
+    """
+    is_retryable = retry_classifier(retry_on)
+
+    def should_retry(exc, attempt):
+        # Returns the wait before the next attempt, or None to give up
+        transient = is_retryable(exc)
+        if breaker is not None:
+            # Only transient failures say anything about the database's health
+            if transient:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        if not transient or attempt >= retries - 1:
+            return None
+        if budget is not None and not budget.try_retry():
+            return None
+        return backoff_delay(attempt, delay, backoff, max_delay, jitter)
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if budget is not None:
+                    budget.record_request()
+                for attempt in range(retries):
+                    if breaker is not None:
+                        breaker.before_call()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        wait = should_retry(e, attempt)
+                        if wait is None:
+                            raise
+                        await asyncio.sleep(wait)
+                    except BaseException:
+                        # Cancelled (e.g. by wait_for) or interrupted: no verdict on the database
+                        if breaker is not None:
+                            breaker.release_trial()
+                        raise
+                    else:
+                        if breaker is not None:
+                            breaker.record_success()
+                        return result
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
+            if budget is not None:
+                budget.record_request()
             for attempt in range(retries):
+                if breaker is not None:
+                    breaker.before_call()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    if attempt < retries - 1:
-                        time.sleep(delay)
-            raise last_exception
+                    wait = should_retry(e, attempt)
+                    if wait is None:
+                        raise
+                    time.sleep(wait)
+                except BaseException:
+                    if breaker is not None:
+                        breaker.release_trial()
+                    raise
+                else:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return result
         return wrapper
     return decorator
 
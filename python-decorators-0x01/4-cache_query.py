@@ -1,22 +1,138 @@
 import time
 import sqlite3 
 import functools
+import inspect
 
-query_cache = {}
+from cache_layer import (QueryCache, current_generation, estimate_size, make_key, set_if_fresh,
+                         track_async_reads, track_reads)
+from shared_cache import from_environment
+from singleflight import AsyncSingleFlight, SingleFlight
+
+# Bounded LRU cache shared by every @cache_query function in this module.
+# Setting QUERY_CACHE_PATH adds a second tier in that SQLite file, shared
+# by every worker process on the host.
+query_cache = from_environment(QueryCache(max_bytes=16 * 1024 * 1024, policy="lru"))
+
+# Concurrent misses for the same key share one execution
+in_flight = SingleFlight()
+async_in_flight = AsyncSingleFlight()
+
+# Streamed results larger than this are passed through without being cached
+MAX_STREAM_BYTES = 1024 * 1024
+
+_MISS = object()
+
+def cache_query(func=None, *, ttl=None, cache=None, wait_timeout=None,
+                max_stream_bytes=MAX_STREAM_BYTES):
+    """Caches results keyed on the query text and its parameters.
+
+    Usable bare (@cache_query) or with options (@cache_query(ttl=60)).
+    Entries remember the tables the query read, so writes committed
+    through @transactional invalidate them; a result whose tables were
+    invalidated while its query ran is returned but not cached.
+    Concurrent misses for the same key run the query once; the other
+    callers wait up to wait_timeout seconds for its result (or its
+    exception). Works for plain functions and coroutine functions alike.
+
+    Generator functions (streamed results) are teed: rows are passed on
+    as they arrive and copied aside, and the copy is cached only if the
+    stream runs to the end and stays under max_stream_bytes. Streams are
+    not coalesced; a hit replays the cached rows.
+    """
+    if func is None:
+        return lambda f: cache_query(f, ttl=ttl, cache=cache, wait_timeout=wait_timeout,
+                                     max_stream_bytes=max_stream_bytes)
+    target = query_cache if cache is None else cache
+    peek = getattr(target, "peek", target.get)
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(conn, *args, **kwargs):
+            key = make_key(func, args, kwargs)
+            cached = target.get(key, _MISS)
+            if cached is not _MISS:
+                yield from cached
+                return
+
+            rows = []
+            size = 0
+            generation = current_generation(target)
+            with track_reads(conn) as tables:
+                for row in func(conn, *args, **kwargs):
+                    if rows is not None:
+                        size += estimate_size(row)
+                        if size > max_stream_bytes:
+                            # Too big to cache: stop copying, keep streaming
+                            rows = None
+                        else:
+                            rows.append(row)
+                    yield row
+            if rows is not None:
+                set_if_fresh(target, key, rows, generation, ttl=ttl, tables=tables)
+        stream_wrapper.cache = target
+        return stream_wrapper
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            key = make_key(func, args, kwargs)
+            result = target.get(key, _MISS)
+            if result is not _MISS:
+                return result
+
+            async def load():
+                generation = current_generation(target)
+                async with track_async_reads(conn) as tables:
+                    result = await func(conn, *args, **kwargs)
+                set_if_fresh(target, key, result, generation, ttl=ttl, tables=tables)
+                return result
+            return await async_in_flight.do(key, load, wait_timeout)
+        async_wrapper.cache = target
+        return async_wrapper
 
-def cache_query(func):
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Assume 'query' is always passed as a keyword argument
-        query = kwargs.get('query')
-        if query in query_cache:
-            return query_cache[query]
-        result = func(*args, **kwargs)
-        query_cache[query] = result
-        return result
+    def wrapper(conn, *args, **kwargs):
+        key = make_key(func, args, kwargs)
+        result = target.get(key, _MISS)
+        if result is not _MISS:
+            return result
+
+        def load():
+            # Another flight may have filled the cache while we waited for the lock;
+            # peek so the miss already counted above is not counted twice
+            cached = peek(key, _MISS)
+            if cached is not _MISS:
+                return cached
+            generation = current_generation(target)
+            with track_reads(conn) as tables:
+                result = func(conn, *args, **kwargs)
+            # Skipped if a write invalidated these tables while the query ran
+            set_if_fresh(target, key, result, generation, ttl=ttl, tables=tables)
+            return result
+        return in_flight.do(key, load, wait_timeout)
+    wrapper.cache = target
     return wrapper
 
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        import aiosqlite
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with aiosqlite.connect('example.db') as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(*args, **kwargs):
+            conn = sqlite3.connect('example.db')
+            try:
+                yield from func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return stream_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect('example.db')
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import os
+import weakref
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from db_pool import PERFORMANCE_PRAGMAS
+
+
+class AsyncSQLitePool:
+    """asyncio counterpart of db_pool.SQLitePool, built on aiosqlite.
+
+    Same behaviour: connections are opened lazily up to max_size,
+    configured once with PERFORMANCE_PRAGMAS, reused most-recently-used
+    first, and rolled back on checkin if a transaction is still open.
+    A pool belongs to the event loop it is first used in.
+    """
+
+    def __init__(self, db_path, max_size=5, pragmas=PERFORMANCE_PRAGMAS, timeout=10.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = pragmas
+        self.timeout = timeout
+        self._cond = asyncio.Condition()
+        self._idle = []
+        self._size = 0
+        self._closed = False
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.db_path, timeout=self.timeout)
+        for name, value in self.pragmas:
+            await conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    async def checkout(self):
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), self.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"No connection to {self.db_path} free after {self.timeout}s") from None
+        try:
+            return await self._connect()
+        except BaseException:
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    async def checkin(self, conn):
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            reusable = True
+        except Exception:
+            reusable = False
+        async with self._cond:
+            if reusable and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                await conn.close()
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.checkout()
+        try:
+            yield conn
+        finally:
+            await self.checkin(conn)
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            await conn.close()
+
+
+# event loop -> {db path -> pool}; pools and their connections are bound to one loop
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_async_pool(db_path, max_size=5):
+    """Returns the pool for db_path in the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    key = os.path.abspath(db_path) if db_path != ":memory:" else db_path
+    pools = _pools.setdefault(loop, {})
+    pool = pools.get(key)
+    if pool is None:
+        pool = pools[key] = AsyncSQLitePool(db_path, max_size=max_size)
+    return pool
+
+
+async def close_async_pools():
+    """Closes every pool created in the running event loop."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.close()
+
+
+def with_async_pooled_connection(db_path, max_size=5):
+    """Async with_pooled_connection: awaits func with a pooled aiosqlite connection as the first argument."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with get_async_pool(db_path, max_size).connection() as conn:
+                return await func(conn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+
+from db_pool import get_pool
+
+
+def rows_by_key(conn, sql, keys, key_index=0):
+    """Runs sql once for all keys and maps each key to its row.
+
+    sql holds a single {} where the IN list goes, e.g.
+    "SELECT * FROM users WHERE id IN ({})"; key_index is the position of
+    the key column in the selected rows. Keys without a row are absent
+    from the result.
+    """
+    placeholders = ", ".join("?" * len(keys))
+    return {row[key_index]: row for row in conn.execute(sql.format(placeholders), list(keys))}
+
+
+def pooled_loader(db_path, sql, key_index=0, **options):
+    """BatchLoader running sql (see rows_by_key) on a pooled connection to db_path.
+
+        get_user = pooled_loader('users.db', "SELECT * FROM users WHERE id IN ({})")
+        get_user.load(1)   # -> (1, 'Alice', ...) or None
+    """
+    def load_rows(keys):
+        with get_pool(db_path).connection() as conn:
+            return rows_by_key(conn, sql, keys, key_index)
+    return BatchLoader(load_rows, **options)
+
+
+class _Batch:
+    __slots__ = ("keys", "results", "error", "full", "done")
+
+    def __init__(self):
+        self.keys = {}              # key -> None, in arrival order without duplicates
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class BatchLoader:
+    """Combines concurrent single-key lookups into one batched lookup (thread version).
+
+    batch_fn(keys) takes a list of distinct keys and returns a mapping
+    key -> value. The first load() of a batch waits up to window seconds,
+    or until max_batch distinct keys have arrived, then calls batch_fn
+    once for everything collected; every caller gets its own key's value
+    (default when the mapping lacks it) or batch_fn's exception.
+
+        users = BatchLoader(lambda ids: load_users(ids))
+        users.load(42)   # from many threads at once -> one IN (...) query
+    """
+
+    def __init__(self, batch_fn, window=0.002, max_batch=100, default=None):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self.default = default
+        self._lock = threading.Lock()
+        self._pending = None
+        self.batches = 0
+        self.loads = 0
+
+    def load(self, key):
+        with self._lock:
+            self.loads += 1
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch:
+                self._pending = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending is batch:
+                    self._pending = None
+                self.batches += 1
+            try:
+                batch.results = self.batch_fn(list(batch.keys))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(key, self.default)
+
+    def load_many(self, keys):
+        """Values for keys, in order, fetched in as few batches as possible from this thread."""
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        for start in range(0, len(keys), self.max_batch):
+            chunk = keys[start:start + self.max_batch]
+            results.update(self.batch_fn(chunk))
+            with self._lock:
+                self.batches += 1
+        return [results.get(key, self.default) for key in keys]
+
+
+class AsyncBatchLoader:
+    """Asyncio version of BatchLoader: load() calls made in the same loop tick share one batch.
+
+    batch_fn is a coroutine function taking a list of keys and returning a
+    mapping key -> value. The batch is dispatched with loop.call_soon once
+    the coroutines that are already runnable have had their turn (or as
+    soon as max_batch keys are waiting), so asyncio.gather(*(loader.load(i)
+    for i in ids)) issues a single query.
+    """
+
+    def __init__(self, batch_fn, max_batch=100, default=None):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.default = default
+        self._pending = None      # key -> list of futures
+        self._handle = None       # the call_soon that will dispatch _pending
+        self._tasks = set()       # running batches; asyncio only keeps weak references to tasks
+        self.batches = 0
+        self.loads = 0
+
+    async def load(self, key):
+        loop = asyncio.get_running_loop()
+        self.loads += 1
+        if self._pending is None:
+            self._pending = {}
+            self._handle = loop.call_soon(self._dispatch)
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        # A batch flushed early at max_batch must not take its scheduled
+        # dispatch with it onto the next batch
+        self._handle.cancel()
+        pending, self._pending, self._handle = self._pending, None, None
+        if pending:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        try:
+            results = await self.batch_fn(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, futures in pending.items():
+            value = results.get(key, self.default)
+            for future in futures:
+                if not future.done():
+                    future.set_result(value)
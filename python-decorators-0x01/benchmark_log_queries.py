@@ -0,0 +1,74 @@
+"""Per-call overhead of log_queries on a cheap indexed lookup.
+
+Times the same query function undecorated, profiled without logging
+(sample_rate=0), with 1% of calls logged and with every call logged,
+and checks the 1% configuration against the overhead budget. Log output
+goes through a queue listener into a discarded stream.
+
+Usage: python benchmark_log_queries.py [--calls N] [--budget-us US]
+"""
+import argparse
+import io
+import logging
+import logging.handlers
+import queue
+import sqlite3
+import sys
+import time
+
+from query_profiler import QueryProfiler, profile_queries
+
+
+def quiet_logger():
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, logging.StreamHandler(io.StringIO()))
+    listener.start()
+    logger = logging.getLogger("benchmark_log_queries")
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, listener
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        func("SELECT * FROM users WHERE id = ?", (i % 1000 + 1,))
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--budget-us", type=float, default=10.0,
+                        help="allowed overhead per call with 1%% sampled logging")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                     ((f"user{i}", f"user{i}@example.com", 18 + i % 60) for i in range(1000)))
+
+    def fetch_user(query, params):
+        return conn.execute(query, params).fetchall()
+
+    logger, listener = quiet_logger()
+    variants = [("undecorated", fetch_user)]
+    for label, rate in (("profile only", 0.0), ("sampled 1%", 0.01), ("log every call", 1.0)):
+        variants.append((label, profile_queries(fetch_user, QueryProfiler(sample_rate=rate, logger=logger))))
+
+    per_call(fetch_user, min(args.calls, 10000))  # warm up
+    timings = {label: per_call(func, args.calls) for label, func in variants}
+    listener.stop()
+
+    base = timings["undecorated"]
+    for label, seconds in timings.items():
+        print(f"{label:<16} {seconds * 1e6:>8.2f} us/call  overhead {(seconds - base) * 1e6:>6.2f} us")
+    overhead = (timings["sampled 1%"] - base) * 1e6
+    within = overhead <= args.budget_us
+    print(f"sampled overhead {overhead:.2f} us vs budget {args.budget_us:.2f} us: {'ok' if within else 'OVER BUDGET'}")
+    return 0 if within else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Calls/second of connect-per-call with_db_connection vs the pooled variant.
+
+Builds a throwaway database, then times a get_user_by_id-style lookup
+through each decorator, single-threaded and from several threads.
+
+Usage: python benchmark_with_db_connection.py [--calls N] [--threads N]
+"""
+import argparse
+import functools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from db_pool import with_pooled_connection
+
+
+def connect_per_call(db_path):
+    """The original with_db_connection: a fresh connection around every call."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(db_path)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+    return decorator
+
+
+def make_database(path, rows=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                     ((f"user{i}", f"user{i}@example.com", 18 + i % 60) for i in range(rows)))
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def run(label, get_user_by_id, calls, threads, rows):
+    per_thread = calls // threads
+
+    def work(offset):
+        for i in range(per_thread):
+            get_user_by_id(user_id=(offset + i) % rows + 1)
+
+    workers = [threading.Thread(target=work, args=(t * per_thread,)) for t in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    total = per_thread * threads
+    print(f"{label:<16} threads={threads:<3} {total:>8} calls {elapsed:>8.3f}s {total / elapsed:>12.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        rows = make_database(db_path)
+
+        def get_user_by_id(conn, user_id):
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+            return cursor.fetchone()
+
+        variants = (
+            ("connect-per-call", connect_per_call(db_path)(get_user_by_id)),
+            ("pooled", with_pooled_connection(db_path, max_size=args.threads)(get_user_by_id)),
+        )
+        for threads in sorted({1, args.threads}):
+            for label, func in variants:
+                run(label, func, args.calls, threads, rows)
+
+
+if __name__ == "__main__":
+    main()
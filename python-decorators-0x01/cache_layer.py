@@ -0,0 +1,358 @@
+import re
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+# Every live cache, so writes can invalidate all of them
+_caches = weakref.WeakSet()
+
+
+def register_cache(cache):
+    """Subscribes cache (anything with invalidate_tables) to invalidate_tables()."""
+    _caches.add(cache)
+
+
+class QueryCache:
+    """Thread-safe query result cache with a byte budget, TTLs and table tags.
+
+    policy is "lru" (evict the least recently used entry) or "lfu" (evict
+    the least frequently used one, oldest first among ties). Entries are
+    evicted until the estimated size of all cached results fits in
+    max_bytes. Each entry remembers the tables its query read, so
+    invalidate_tables() can drop exactly the results a write made stale.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, default_ttl=None, policy="lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError("policy must be 'lru' or 'lfu'")
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.policy = policy
+        self._lock = threading.RLock()
+        self._entries = {}                 # key -> _Entry
+        self._lru = OrderedDict()          # key -> None, least recently used first
+        self._lfu = {}                     # use count -> OrderedDict of keys, oldest first
+        self._by_table = {}                # table name -> set of keys
+        self._bytes = 0
+        self._stats = dict.fromkeys(
+            ("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+        register_cache(self)
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._touch(key, entry)
+            self._stats["hits"] += 1
+            return entry.value
+
+    def peek(self, key, default=None):
+        """Like get(), but leaves hit/miss counts and recency untouched."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry.expires_at is not None and entry.expires_at <= time.monotonic()):
+                return default
+            return entry.value
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                entry.expires_at is None or entry.expires_at > time.monotonic())
+
+    def set(self, key, value, ttl=None, tables=()):
+        """Caches value under key. Values larger than the whole budget are not cached."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, size,
+                           None if ttl is None else time.monotonic() + ttl,
+                           frozenset(t.lower() for t in tables))
+            self._entries[key] = entry
+            self._bytes += size
+            if self.policy == "lru":
+                self._lru[key] = None
+            else:
+                self._lfu.setdefault(1, OrderedDict())[key] = None
+            for table in entry.tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._evict(protect=key)
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._stats["invalidations"] += 1
+
+    def invalidate_tables(self, tables):
+        """Drops every entry whose query read one of tables."""
+        with self._lock:
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats,
+                        entries=len(self._entries),
+                        bytes=self._bytes,
+                        max_bytes=self.max_bytes,
+                        hit_rate=self._stats["hits"] / lookups if lookups else 0.0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _touch(self, key, entry):
+        if self.policy == "lru":
+            self._lru.move_to_end(key)
+            return
+        bucket = self._lfu[entry.count]
+        del bucket[key]
+        if not bucket:
+            del self._lfu[entry.count]
+        entry.count += 1
+        self._lfu.setdefault(entry.count, OrderedDict())[key] = None
+
+    def _evict(self, protect):
+        while self._bytes > self.max_bytes:
+            if self.policy == "lru":
+                victim = next((k for k in self._lru if k != protect), None)
+            else:
+                victim = None
+                for count in sorted(self._lfu):
+                    victim = next((k for k in self._lfu[count] if k != protect), None)
+                    if victim is not None:
+                        break
+            if victim is None:
+                return
+            self._remove(victim)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if self.policy == "lru":
+            del self._lru[key]
+        else:
+            bucket = self._lfu[entry.count]
+            del bucket[key]
+            if not bucket:
+                del self._lfu[entry.count]
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "tables", "count")
+
+    def __init__(self, value, size, expires_at, tables):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.tables = tables
+        self.count = 1
+
+
+# Invalidation generations: _generation counts invalidate_tables() calls and
+# _invalidated_at maps each table to the generation of its last invalidation
+_generation_lock = threading.Lock()
+_generation = 0
+_invalidated_at = {}
+
+
+def current_generation(cache=None):
+    """Snapshot to take before running a query whose result may be cached (see set_if_fresh).
+
+    For a cache shared between processes (one with a generations()
+    method) the snapshot also covers invalidations made by other processes.
+    """
+    shared = getattr(cache, "generations", None)
+    return _generation, (shared() if shared is not None else None)
+
+
+def invalidate_tables(tables):
+    """Invalidates the given tables in every QueryCache in this process."""
+    global _generation
+    if not tables:
+        return
+    with _generation_lock:
+        _generation += 1
+        for table in tables:
+            _invalidated_at[table.lower()] = _generation
+    for cache in list(_caches):
+        cache.invalidate_tables(tables)
+
+
+def set_if_fresh(cache, key, value, generation, ttl=None, tables=()):
+    """Caches value unless one of tables was invalidated since generation was taken.
+
+    A read that started before a write committed can finish after that
+    write's invalidation; storing its rows then would cache stale data
+    with nothing left to invalidate it. Returns whether value was stored.
+    """
+    local, shared = generation
+    with _generation_lock:
+        if any(_invalidated_at.get(table.lower(), 0) > local for table in tables):
+            return False
+        # Under the lock, so an invalidation either comes before this check or drops the entry
+        if shared is None:
+            return cache.set(key, value, ttl=ttl, tables=tables)
+        # The shared cache re-checks other processes' invalidations inside its own write
+        return cache.set(key, value, ttl=ttl, tables=tables, since=shared)
+
+
+def make_key(func, args, kwargs):
+    """Cache key covering the function and all its arguments (query text and parameters)."""
+    return (func.__module__, func.__qualname__, _freeze(args), _freeze(sorted(kwargs.items())))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def estimate_size(value):
+    """Approximate memory footprint in bytes of a query result (rows of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k) + estimate_size(v)
+    return size
+
+
+_TABLE_REF = re.compile(r"\b(?:from|join|into|update)\s+[\"'`\[]?([A-Za-z_][\w$]*)", re.IGNORECASE)
+# The table list of a FROM clause, for comma joins ("FROM users u, posts p")
+_FROM_LIST = re.compile(
+    r"\bfrom\s+(.+?)(?=\b(?:where|join|inner|left|right|full|cross|natural|on|using|group|order|"
+    r"limit|having|window|union|intersect|except|returning)\b|[();]|$)", re.IGNORECASE | re.DOTALL)
+_LEADING_NAME = re.compile(r"^\s*[\"'`\[]?([A-Za-z_][\w$]*)")
+
+
+def tables_in_sql(sql):
+    """Best-effort list of the tables a SQL string names.
+
+    Used where the authorizer hook is unavailable (e.g. aiosqlite
+    connections); returns an empty set when sql is not a string.
+    """
+    if not isinstance(sql, str):
+        return set()
+    names = set(_TABLE_REF.findall(sql))
+    for table_list in _FROM_LIST.findall(sql):
+        for item in table_list.split(","):
+            match = _LEADING_NAME.match(item)
+            if match:
+                names.add(match.group(1))
+    return {name.lower() for name in names}
+
+
+_WRITTEN_TABLE = re.compile(
+    r"\b(?:insert\s+(?:or\s+\w+\s+)?into|replace\s+into|update(?:\s+or\s+\w+)?|delete\s+from)"
+    r"\s+[\"'`\[]?([A-Za-z_][\w$]*)", re.IGNORECASE)
+
+
+def tables_written_in_sql(sql):
+    """Best-effort set of the tables an INSERT/REPLACE/UPDATE/DELETE statement writes."""
+    if not isinstance(sql, str):
+        return set()
+    return {name.lower() for name in _WRITTEN_TABLE.findall(sql)}
+
+
+_READ_ACTIONS = {sqlite3.SQLITE_READ}
+_WRITE_ACTIONS = {sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE}
+
+
+@contextmanager
+def track_tables(conn, actions):
+    """Records the tables touched by statements run on conn inside the block.
+
+    Uses sqlite's authorizer hook, which sees every table a statement reads
+    or writes (including through views and subqueries) as it is compiled.
+    """
+    tables = set()
+
+    def authorizer(action, arg1, arg2, db_name, trigger):
+        if action in actions and arg1 and not arg1.startswith("sqlite_"):
+            tables.add(arg1.lower())
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        yield tables
+    finally:
+        conn.set_authorizer(None)
+
+
+def track_reads(conn):
+    return track_tables(conn, _READ_ACTIONS)
+
+
+def track_writes(conn):
+    return track_tables(conn, _WRITE_ACTIONS)
+
+
+def track_async_reads(conn):
+    """track_reads for aiosqlite connections: the tables named by statements run in the block."""
+    return _track_async_tables(conn, tables_in_sql)
+
+
+def track_async_writes(conn):
+    """track_writes for aiosqlite connections, which have no authorizer hook.
+
+    Watches the statements run on conn through its trace callback and
+    collects the tables they write (see tables_written_in_sql).
+    """
+    return _track_async_tables(conn, tables_written_in_sql)
+
+
+@asynccontextmanager
+async def _track_async_tables(conn, parse):
+    tables = set()
+
+    def trace(statement):
+        tables.update(parse(statement))
+
+    await conn.set_trace_callback(trace)
+    try:
+        yield tables
+    finally:
+        await conn.set_trace_callback(None)
@@ -0,0 +1,144 @@
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Applied once to every new pooled connection
+PERFORMANCE_PRAGMAS = (
+    ("journal_mode", "WAL"),     # readers and the writer stop blocking each other
+    ("synchronous", "NORMAL"),   # fsync at checkpoints only; safe with WAL
+    ("cache_size", -64000),      # 64 MB page cache per connection
+    ("mmap_size", 268435456),    # read the first 256 MB through mmap
+    ("temp_store", "MEMORY"),
+)
+
+# Size of each connection's compiled-statement cache. Because pooled
+# connections live on, a repeated query is parsed once per connection
+# instead of on every call.
+CACHED_STATEMENTS = 256
+
+
+class SQLitePool:
+    """Bounded pool of long-lived sqlite3 connections to one database file.
+
+    Connections are opened lazily up to max_size, configured once with
+    PERFORMANCE_PRAGMAS, and handed out most-recently-used first so their
+    page and statement caches stay warm. A checked-in connection that is
+    still inside a transaction is rolled back.
+    """
+
+    def __init__(self, db_path, max_size=5, pragmas=PERFORMANCE_PRAGMAS,
+                 cached_statements=CACHED_STATEMENTS, timeout=10.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = pragmas
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._closed = False
+
+    def _connect(self):
+        # Connections move between threads with each checkout, never concurrently
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def checkout(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                if not self._cond.wait(self.timeout):
+                    raise TimeoutError(f"No connection to {self.db_path} free after {self.timeout}s")
+        try:
+            return self._connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+        with self._cond:
+            if reusable and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                conn.close()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, max_size=5):
+    """Returns the process-wide pool for db_path, creating it on first use."""
+    key = os.path.abspath(db_path) if db_path != ":memory:" else db_path
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(db_path, max_size=max_size)
+        return pool
+
+
+def with_pooled_connection(db_path, max_size=5):
+    """Pooled drop-in for with_db_connection: passes a pooled connection as the first argument.
+
+    Coroutine functions get a pooled aiosqlite connection instead (see
+    async_db_pool). For generator functions the connection stays checked
+    out until the generator is exhausted or closed.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            # aiosqlite is only needed by async callers
+            from async_db_pool import with_async_pooled_connection
+            return with_async_pooled_connection(db_path, max_size)(func)
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def stream_wrapper(*args, **kwargs):
+                with get_pool(db_path, max_size).connection() as conn:
+                    yield from func(conn, *args, **kwargs)
+            return stream_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_pool(db_path, max_size).connection() as conn:
+                return func(conn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,182 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from cache_layer import invalidate_tables, track_writes
+
+_STOP = object()
+
+
+class GroupCommitter:
+    """Applies write operations from many callers in shared transactions.
+
+    A single writer thread owns one connection to db_path. Operations
+    submitted within window seconds of the first one in a batch, up to
+    max_batch of them, run inside one transaction and share one COMMIT
+    (and so one fsync). Each operation runs under its own SAVEPOINT: if it
+    raises, only its own changes are rolled back and only its Future gets
+    the exception; the rest of the batch still commits. If the COMMIT
+    itself fails, every operation in the batch fails with that error.
+    Some errors (INSERT OR ROLLBACK, SQLITE_FULL, I/O errors) roll back the
+    whole transaction rather than the savepoint: the operation that hit
+    one and those applied before it in the batch fail with it, and the
+    ones after it are applied in a new transaction.
+
+    Operations are called as func(conn, *args, **kwargs) and must not
+    commit or roll back themselves.
+    """
+
+    def __init__(self, db_path, window=0.005, max_batch=100, timeout=10.0):
+        self.db_path = db_path
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queues func(conn, *args, **kwargs); returns a Future for its result.
+
+        Raises RuntimeError once the committer is closed or its writer thread has stopped.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed or not self._thread.is_alive():
+                raise RuntimeError("GroupCommitter is closed")
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        """Like submit(), but waits for the batch to commit and returns func's result."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def close(self):
+        """Commits what is already queued, then stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        conn = None
+        try:
+            # isolation_level=None: transactions and savepoints are managed here explicitly
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    self._apply(conn, batch)
+                except BaseException as e:
+                    self._fail_batch(conn, batch, e)
+                    # One bad batch must not end the writer thread
+                    if not isinstance(e, Exception):
+                        raise
+        finally:
+            if conn is not None:
+                conn.close()
+            self._fail_queued()
+
+    def _fail_batch(self, conn, batch, error):
+        if conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        for future, _, _, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _fail_queued(self):
+        # The writer is gone: refuse new work and fail whatever is still queued
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP and item[0].set_running_or_notify_cancel():
+                    item[0].set_exception(RuntimeError("GroupCommitter writer has stopped"))
+
+    def _apply(self, conn, batch):
+        # Skip operations whose caller cancelled the Future before we got to them
+        batch = [op for op in batch if op[0].set_running_or_notify_cancel()]
+        while batch:
+            batch = self._apply_transaction(conn, batch)
+
+    def _apply_transaction(self, conn, batch):
+        """Applies batch in one transaction; returns the operations left unapplied if it was aborted."""
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for future, _, _, _ in batch:
+                future.set_exception(e)
+            return []
+
+        succeeded = []
+        written = set()
+        for index, (future, func, args, kwargs) in enumerate(batch):
+            conn.execute("SAVEPOINT op")
+            try:
+                with track_writes(conn) as tables:
+                    result = func(conn, *args, **kwargs)
+            except Exception as e:
+                if not conn.in_transaction:
+                    # The error rolled back the whole transaction, savepoint included
+                    future.set_exception(e)
+                    for done, _ in succeeded:
+                        done.set_exception(e)
+                    return batch[index + 1:]
+                conn.execute("ROLLBACK TO op")
+                conn.execute("RELEASE op")
+                future.set_exception(e)
+            else:
+                conn.execute("RELEASE op")
+                succeeded.append((future, result))
+                written |= tables
+
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _ in succeeded:
+                future.set_exception(e)
+            return []
+
+        self.batches += 1
+        self.operations += len(batch)
+        # Cached results read from the tables we just changed are now stale
+        invalidate_tables(written)
+        for future, result in succeeded:
+            future.set_result(result)
+        return []
@@ -0,0 +1,261 @@
+import atexit
+import bisect
+import functools
+import inspect
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds: 50us, 100us, 200us, ... ~52s
+BUCKET_BOUNDS = tuple(0.00005 * 2 ** i for i in range(21))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bvalues\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*",
+                          re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalizes a query so that runs differing only in literals group together.
+
+    String and number literals become ?, IN lists and multi-row VALUES
+    lists collapse to a single placeholder group, and whitespace and case
+    are normalized:
+
+        SELECT * FROM users WHERE id IN (1, 2, 3) AND name = 'x'
+        -> select * from users where id in (?) and name = ?
+
+    Anything that is not a string (profiled functions do not always take
+    the SQL first) is reported by its repr.
+    """
+    if not isinstance(sql, str):
+        # Checked before the cache, which would fail on unhashable arguments
+        return repr(sql)
+    return _fingerprint_text(sql)
+
+
+@functools.lru_cache(maxsize=2048)
+def _fingerprint_text(sql):
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip().lower()
+    text = _IN_LIST.sub("in (?)", text)
+    return _VALUES_LIST.sub(r"values \1", text)
+
+
+class LatencyHistogram:
+    """Fixed log-scale latency histogram (buckets double from 50us)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for bound, n in zip(BUCKET_BOUNDS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class QueryStats:
+    __slots__ = ("fingerprint", "latency", "rows", "errors")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.errors = 0
+
+
+def count_rows(result):
+    """Rows returned by a query function: len() of fetchall() lists, 1 for a single row."""
+    if isinstance(result, list):
+        return len(result)
+    if result is None:
+        return 0
+    return 1
+
+
+class QueryProfiler:
+    """Aggregates per-fingerprint latency and row counts, and logs a sample of queries.
+
+    Every call updates the in-memory stats (a dict lookup and a histogram
+    bump under a lock). Only a sample_rate fraction of calls produce a log
+    record, and records are handed to a QueueHandler, so the stream write
+    happens on a listener thread rather than in the caller.
+    """
+
+    def __init__(self, sample_rate=1.0, logger=None, slow_threshold=None):
+        self.sample_rate = sample_rate
+        # Queries at least this slow (seconds) are always logged, sampled or not
+        self.slow_threshold = slow_threshold
+        self.logger = logger if logger is not None else default_logger()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, query, elapsed, rows=0, error=None):
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key)
+            stats.latency.add(elapsed)
+            stats.rows += rows
+            if error is not None:
+                stats.errors += 1
+
+        slow = self.slow_threshold is not None and elapsed >= self.slow_threshold
+        if slow or error is not None or self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self.logger.log(
+                logging.WARNING if error is not None else logging.INFO,
+                "Executing SQL Query: %s (%.3f ms, %d rows)", query, elapsed * 1000, rows,
+                extra={"query": query, "fingerprint": key, "elapsed": elapsed,
+                       "rows": rows, "error": error})
+
+    def top_slowest(self, n=10, by="total"):
+        """The n fingerprints with the largest total, mean, max or p95 latency."""
+        metrics = {
+            "total": lambda s: s.latency.total,
+            "mean": lambda s: s.latency.mean,
+            "max": lambda s: s.latency.max,
+            "p95": lambda s: s.latency.percentile(95),
+        }
+        if by not in metrics:
+            raise ValueError(f"by must be one of {sorted(metrics)}")
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=metrics[by], reverse=True)[:n]
+            return [{
+                "fingerprint": s.fingerprint,
+                "calls": s.latency.count,
+                "errors": s.errors,
+                "rows": s.rows,
+                "total": s.latency.total,
+                "mean": s.latency.mean,
+                "p50": s.latency.percentile(50),
+                "p95": s.latency.percentile(95),
+                "p99": s.latency.percentile(99),
+                "max": s.latency.max,
+            } for s in ranked]
+
+    def report(self, n=10, by="total"):
+        lines = [f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'rows':>8}  query"]
+        for row in self.top_slowest(n, by):
+            lines.append(
+                f"{row['calls']:>8} {row['total'] * 1000:>10.2f} {row['mean'] * 1000:>9.3f} "
+                f"{row['p95'] * 1000:>9.3f} {row['max'] * 1000:>9.3f} {row['rows']:>8}  {row['fingerprint']}")
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def profile_queries(func, profiler):
+    """Wraps func so each call is timed and recorded on profiler.
+
+    The query is taken from the query keyword argument or else the first
+    positional argument, as log_queries always has. Coroutine functions
+    are timed until their result is ready; generator functions (streamed
+    results) from the first row requested until the stream is exhausted
+    or closed, counting the rows actually yielded.
+    """
+    def query_of(args, kwargs):
+        if 'query' in kwargs:
+            return kwargs['query']
+        return args[0] if args else None
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            query = query_of(args, kwargs)
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                profiler.record(query, time.perf_counter() - started, error=e)
+                raise
+            profiler.record(query, time.perf_counter() - started, count_rows(result))
+            return result
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def stream_wrapper(*args, **kwargs):
+            query = query_of(args, kwargs)
+            started = time.perf_counter()
+            rows = 0
+            error = None
+            try:
+                for row in func(*args, **kwargs):
+                    rows += 1
+                    yield row
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                profiler.record(query, time.perf_counter() - started, rows, error=error)
+        return stream_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        query = query_of(args, kwargs)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            profiler.record(query, time.perf_counter() - started, error=e)
+            raise
+        profiler.record(query, time.perf_counter() - started, count_rows(result))
+        return result
+    return wrapper
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def default_logger(stream=None):
+    """The "query_profiler" logger, writing to stream (stdout) through a background queue listener."""
+    global _listener
+    logger = logging.getLogger("query_profiler")
+    with _listener_lock:
+        if _listener is None:
+            records = queue.SimpleQueue()
+            handler = logging.StreamHandler(stream or sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _listener = logging.handlers.QueueListener(records, handler)
+            _listener.start()
+            # Drain what is still queued before the interpreter exits
+            atexit.register(_listener.stop)
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
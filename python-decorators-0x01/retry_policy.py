@@ -0,0 +1,158 @@
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# sqlite3.OperationalError messages that describe a temporary condition
+TRANSIENT_SQLITE_MESSAGES = (
+    "database is locked",
+    "database table is locked",
+    "database schema has changed",
+    "disk i/o error",
+)
+
+
+def is_transient_error(exc):
+    """Default retry classification: lock contention and connectivity errors only.
+
+    Programming errors (bad SQL, missing tables, constraint violations)
+    fail the same way every time, so they are never retried.
+    """
+    if isinstance(exc, sqlite3.OperationalError):
+        message = str(exc).lower()
+        return any(text in message for text in TRANSIENT_SQLITE_MESSAGES)
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def retry_classifier(retry_on):
+    """Normalizes retry_on (predicate, exception class or tuple of classes) to a predicate."""
+    if retry_on is None:
+        return is_transient_error
+    if isinstance(retry_on, type) or isinstance(retry_on, tuple):
+        return lambda exc: isinstance(exc, retry_on)
+    return retry_on
+
+
+def backoff_delay(attempt, base, factor=2.0, max_delay=30.0, jitter=True):
+    """Delay before retry number attempt (0-based).
+
+    Grows as base * factor**attempt up to max_delay. With jitter the delay is
+    drawn uniformly from [0, that value] ("full jitter"), which spreads out
+    clients that failed together instead of having them retry in lockstep.
+    """
+    delay = min(max_delay, base * (factor ** attempt))
+    if jitter:
+        return random.uniform(0, delay)
+    return delay
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent traffic.
+
+    Over a sliding window of window seconds, retries are allowed while
+    retries < min_retries + ratio * requests. During an outage, when every
+    call fails, this turns "each call retried N times" into "at most ratio
+    extra load".
+    """
+
+    def __init__(self, ratio=0.1, min_retries=10, window=10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_retry(self):
+        """Reserves one retry; returns False when the budget is spent."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the database while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast while the database looks unhealthy.
+
+    closed:    calls go through; failure_threshold consecutive transient
+               failures open the circuit.
+    open:      calls fail immediately with CircuitOpenError until
+               recovery_timeout seconds have passed.
+    half-open: up to half_open_calls trial calls are let through; a success
+               closes the circuit, a failure opens it again, and a call
+               that is cancelled or interrupted gives its slot back.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_calls=1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trials = 0
+
+    def before_call(self):
+        """Raises CircuitOpenError if the call must not go through."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN:
+                raise CircuitOpenError("Circuit open: database marked unhealthy")
+            if self._state == self.HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    raise CircuitOpenError("Circuit half-open: trial call already in flight")
+                self._trials += 1
+
+    def release_trial(self):
+        """Gives back a half-open trial slot whose call ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
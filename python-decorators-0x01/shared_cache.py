@@ -0,0 +1,380 @@
+import hashlib
+import marshal
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+import cache_layer
+
+# Values at least this large are zlib-compressed before being stored
+COMPRESS_MIN_BYTES = 1024
+# A hit only rewrites last_access when it is older than this many seconds,
+# so hot keys do not turn every read into a write
+ACCESS_GRANULARITY = 1.0
+
+_MARSHAL = b"m"
+_PICKLE = b"p"
+_ZLIB = b"z"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS entry_tables (
+    table_name TEXT NOT NULL,
+    key BLOB NOT NULL REFERENCES entries (key) ON DELETE CASCADE,
+    PRIMARY KEY (table_name, key)
+);
+CREATE INDEX IF NOT EXISTS entry_tables_key ON entry_tables (key);
+CREATE TABLE IF NOT EXISTS generations (
+    table_name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+# Generation bumped by clear() and single-key invalidations, which are not tied to tables
+ALL_TABLES = "*"
+
+
+def dumps(value):
+    """Compact serialization for query results.
+
+    Rows of plain scalars (the common case) go through marshal, which is
+    smaller and faster than pickle; anything else falls back to pickle.
+    Large payloads are zlib-compressed. The first bytes record the format.
+    """
+    try:
+        tag, payload = _MARSHAL, marshal.dumps(value)
+    except ValueError:
+        tag, payload = _PICKLE, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        return _ZLIB + tag + zlib.compress(payload)
+    return tag + payload
+
+
+def loads(data):
+    data = bytes(data)
+    if data[:1] == _ZLIB:
+        data = data[1:2] + zlib.decompress(data[2:])
+    tag, payload = data[:1], data[1:]
+    if tag == _MARSHAL:
+        return marshal.loads(payload)
+    return pickle.loads(payload)
+
+
+def _stable_repr(value):
+    # repr() of sets depends on per-process string hashing; sort them so
+    # every worker derives the same digest for the same key
+    if isinstance(value, (set, frozenset)):
+        return "{" + ", ".join(sorted(_stable_repr(v) for v in value)) + "}"
+    if isinstance(value, tuple):
+        return "(" + ", ".join(_stable_repr(v) for v in value) + ",)"
+    return repr(value)
+
+
+def digest_key(key):
+    return hashlib.blake2b(_stable_repr(key).encode("utf-8"), digest_size=16).digest()
+
+
+class SharedQueryCache:
+    """Query cache stored in a local SQLite file, shared by every process on the host.
+
+    The file runs in WAL mode so readers never block each other. Every
+    write, including eviction, happens in a single transaction, so a
+    process dying mid-operation leaves the cache consistent. Entries are
+    evicted least recently used first once their total stored size exceeds
+    max_bytes. Only share the file between processes you trust: values are
+    deserialized with marshal/pickle.
+
+    Each invalidation also bumps a per-table generation counter (see
+    generations()), so caches other processes keep in memory can tell
+    that their copies went stale.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, default_ttl=None, busy_timeout=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = dict.fromkeys(("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+        cache_layer.register_cache(self)
+
+    def _conn(self):
+        # sqlite3 connections must stay on the thread that created them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat, n=1):
+        with self._stats_lock:
+            self._stats[stat] += n
+
+    def lookup(self, key):
+        """Returns (value, expires_at, tables) for key, or None on a miss."""
+        conn = self._conn()
+        digest = digest_key(key)
+        row = conn.execute(
+            "SELECT value, expires_at, last_access FROM entries WHERE key = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        value, expires_at, last_access = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (digest, now))
+            self._count("expirations")
+            self._count("misses")
+            return None
+
+        if now - last_access > ACCESS_GRANULARITY:
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, digest))
+        tables = {name for (name,) in conn.execute(
+            "SELECT table_name FROM entry_tables WHERE key = ?", (digest,))}
+        self._count("hits")
+        return loads(value), expires_at, tables
+
+    def get(self, key, default=None):
+        found = self.lookup(key)
+        return default if found is None else found[0]
+
+    def peek(self, key, default=None):
+        """Like get(), but leaves hit/miss counts and last_access untouched."""
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (digest_key(key), time.time())
+        ).fetchone()
+        return default if row is None else loads(row[0])
+
+    def moved(self, since, tables, conn=None):
+        """True if tables (or '*') were invalidated, by any process, after generations() returned since."""
+        names = [table.lower() for table in tables] + [ALL_TABLES]
+        placeholders = ", ".join("?" * len(names))
+        current = dict((conn or self._conn()).execute(
+            f"SELECT table_name, generation FROM generations WHERE table_name IN ({placeholders})",
+            names
+        ))
+        return any(current.get(name, 0) != since.get(name, 0) for name in names)
+
+    def set(self, key, value, ttl=None, tables=(), since=None):
+        """Stores value; returns whether it was stored.
+
+        since is a generations() snapshot taken before the query ran: if any
+        of tables was invalidated after it (in this or another process),
+        the value is stale and is not stored.
+        """
+        data = dumps(value)
+        if len(data) > self.max_bytes:
+            return False
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        digest = digest_key(key)
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Checked inside the write transaction, so no invalidation can slip in before the insert
+            if since is not None and self.moved(since, tables, conn):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (digest, data, len(data), expires_at, now)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO entry_tables (table_name, key) VALUES (?, ?)",
+                [(table.lower(), digest) for table in tables]
+            )
+            evicted = self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count("evictions", evicted)
+        return True
+
+    def _evict(self, conn, now):
+        """Drops expired entries, then LRU ones, until under budget. Runs inside set()'s transaction."""
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return evicted
+        for digest, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+            evicted += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return evicted
+
+    def _write_and_bump(self, sql, params, tables):
+        """Runs sql and bumps the generation of tables, in one transaction; returns the rowcount."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(sql, params)
+            conn.executemany(
+                "INSERT INTO generations (table_name, generation) VALUES (?, 1) "
+                "ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1",
+                [(table,) for table in tables]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Our own commits do not change data_version: drop the cached generations
+        self._local.generations = None
+        return cur.rowcount
+
+    def generations(self):
+        """Returns {table name: generation}, re-read only when another connection committed.
+
+        Repeated calls return the same dict object while nothing changed.
+        """
+        conn = self._conn()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        cached = getattr(self._local, "generations", None)
+        if cached is None or version != self._local.data_version:
+            cached = dict(conn.execute("SELECT table_name, generation FROM generations"))
+            self._local.generations = cached
+            self._local.data_version = version
+        return cached
+
+    def invalidate(self, key):
+        removed = self._write_and_bump("DELETE FROM entries WHERE key = ?", (digest_key(key),),
+                                       [ALL_TABLES])
+        self._count("invalidations", removed)
+
+    def invalidate_tables(self, tables):
+        tables = [table.lower() for table in tables]
+        if not tables:
+            return
+        placeholders = ", ".join("?" * len(tables))
+        removed = self._write_and_bump(
+            f"DELETE FROM entries WHERE key IN "
+            f"(SELECT key FROM entry_tables WHERE table_name IN ({placeholders}))",
+            tables, tables
+        )
+        self._count("invalidations", removed)
+
+    def clear(self):
+        self._write_and_bump("DELETE FROM entries", (), [ALL_TABLES])
+
+    def stats(self):
+        entries, stored = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        with self._stats_lock:
+            return dict(self._stats, entries=entries, bytes=stored, max_bytes=self.max_bytes)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class TieredCache:
+    """In-process QueryCache in front of a SharedQueryCache.
+
+    Reads try the local tier first and promote shared-tier hits into it
+    (keeping their original expiry); writes and invalidations go to both.
+    Before each read the shared file's invalidation generations are
+    checked, so tables invalidated by another process are dropped from the
+    local tier too.
+    """
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._seen = shared.generations()
+
+    def _sync(self):
+        current = self.shared.generations()
+        with self._lock:
+            if current is self._seen:
+                return
+            changed = {table for table, generation in current.items()
+                       if self._seen.get(table) != generation}
+            self._seen = current
+        if ALL_TABLES in changed:
+            self.local.clear()
+        elif changed:
+            self.local.invalidate_tables(changed)
+
+    def get(self, key, default=None):
+        self._sync()
+        missing = object()
+        value = self.local.get(key, missing)
+        if value is not missing:
+            return value
+        found = self.shared.lookup(key)
+        if found is None:
+            return default
+        value, expires_at, tables = found
+        ttl = None if expires_at is None else max(0.0, expires_at - time.time())
+        self.local.set(key, value, ttl=ttl, tables=tables)
+        return value
+
+    def peek(self, key, default=None):
+        self._sync()
+        missing = object()
+        value = self.local.peek(key, missing)
+        return self.shared.peek(key, default) if value is missing else value
+
+    def generations(self):
+        return self.shared.generations()
+
+    def set(self, key, value, ttl=None, tables=(), since=None):
+        stored = self.shared.set(key, value, ttl=ttl, tables=tables, since=since)
+        if not stored and since is not None and self.shared.moved(since, tables):
+            # Stale: invalidated by some process while the query ran
+            return False
+        return self.local.set(key, value, ttl=ttl, tables=tables) or stored
+
+    def invalidate(self, key):
+        self.local.invalidate(key)
+        self.shared.invalidate(key)
+
+    def invalidate_tables(self, tables):
+        self.local.invalidate_tables(tables)
+        self.shared.invalidate_tables(tables)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def stats(self):
+        return {"local": self.local.stats(), "shared": self.shared.stats()}
+
+
+def from_environment(local, variable="QUERY_CACHE_PATH"):
+    """Wraps local in a TieredCache when the environment names a shared cache file."""
+    path = os.environ.get(variable)
+    if not path:
+        return local
+    return TieredCache(local, SharedQueryCache(path))
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when a caller gives up waiting on another caller's in-flight call."""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key (thread version).
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight block until it finishes and receive the same result, or the
+    same exception. A waiting caller gives up with SingleFlightTimeout
+    after timeout seconds; the in-flight call itself is not interrupted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls that share a key (asyncio version).
+
+    Same semantics as SingleFlight for coroutines: the first caller starts
+    coro_fn() in its own task and every caller, that first one included,
+    awaits its outcome. A caller that times out or is cancelled only stops
+    waiting; the shared call is cancelled once no caller is left waiting
+    for it, so one client going away never cancels the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, coro_fn, timeout=None):
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(coro_fn()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.executions += 1
+            timeout = None  # The caller that started the call waits for it like a plain await
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            if call.task.done():
+                raise  # The shared call itself timed out
+            raise SingleFlightTimeout(
+                f"Timed out after {timeout}s waiting for in-flight call {key!r}") from None
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _finished(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Every waiter may have given up; mark the exception as retrieved to
+        # avoid "Task exception was never retrieved" warnings
+        if not call.task.cancelled():
+            call.task.exception()
@@ -0,0 +1,22 @@
+# Rows per cursor.fetchmany() call when streaming a result
+DEFAULT_BLOCK_SIZE = 1000
+
+
+def stream_rows(cursor, block_size=DEFAULT_BLOCK_SIZE):
+    """Yields the rows of an executed cursor, fetched block_size at a time.
+
+    Memory use is bounded by one block however large the result is. Meant
+    to be yielded from a generator function decorated with
+    with_db_connection, which keeps the connection until the stream ends:
+
+        @with_db_connection
+        def stream_all_users(conn, query):
+            cursor = conn.cursor()
+            cursor.execute(query)
+            yield from stream_rows(cursor)
+    """
+    while True:
+        rows = cursor.fetchmany(block_size)
+        if not rows:
+            return
+        yield from rows
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Unit tests for group_commit.GroupCommitter."""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from group_commit import GroupCommitter
+
+
+def insert(conn, user_id):
+    conn.execute("INSERT INTO users (id) VALUES (?)", (user_id,))
+    return user_id
+
+
+def insert_or_rollback(conn, user_id):
+    conn.execute("INSERT OR ROLLBACK INTO users (id) VALUES (?)", (user_id,))
+    return user_id
+
+
+def fail(conn):
+    conn.execute("INSERT INTO users (id) VALUES (999)")
+    raise ValueError("boom")
+
+
+class TestGroupCommitter(unittest.TestCase):
+    """Failures inside a batch resolve every Future and keep the writer alive."""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        conn.execute("INSERT INTO users (id) VALUES (1)")
+        conn.commit()
+        conn.close()
+        # A long window so every submit below lands in the same batch
+        self.committer = GroupCommitter(self.db_path, window=0.5)
+
+    def tearDown(self):
+        self.committer.close()
+        os.remove(self.db_path)
+
+    def stored_ids(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+        finally:
+            conn.close()
+
+    def test_failing_op_in_middle_of_batch(self):
+        """Only the failing operation is rolled back; its neighbours commit."""
+        futures = [self.committer.submit(insert, 2), self.committer.submit(fail),
+                   self.committer.submit(insert, 3)]
+        self.assertEqual(futures[0].result(timeout=5), 2)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        self.assertEqual(futures[2].result(timeout=5), 3)
+        self.assertEqual(self.stored_ids(), [1, 2, 3])
+        self.assertEqual(self.committer.batches, 1)
+
+    def test_transaction_aborting_op(self):
+        """INSERT OR ROLLBACK fails its batch so far; later operations still apply."""
+        futures = [self.committer.submit(insert, 2), self.committer.submit(insert_or_rollback, 1),
+                   self.committer.submit(insert, 3)]
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[0].result(timeout=5)
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[1].result(timeout=5)
+        self.assertEqual(futures[2].result(timeout=5), 3)
+        self.assertEqual(self.stored_ids(), [1, 3])
+        # The writer survived and keeps committing
+        self.assertEqual(self.committer.call(insert, 4), 4)
+        self.assertEqual(self.stored_ids(), [1, 3, 4])
+
+    def test_submit_raises_once_writer_stopped(self):
+        """Work queued for a dead writer fails instead of hanging."""
+        stop = threading.Event()
+
+        def crash(conn):
+            stop.wait(5)
+            raise SystemExit
+
+        committer = GroupCommitter(self.db_path, max_batch=1)
+        crashed = committer.submit(crash)
+        queued = committer.submit(insert, 2)
+        stop.set()
+        with self.assertRaises(SystemExit):
+            crashed.result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            queued.result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            committer.submit(insert, 3)
+        committer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Unit tests for query_profiler."""
+
+import logging
+import unittest
+
+from query_profiler import QueryProfiler, fingerprint, profile_queries
+
+
+class TestFingerprint(unittest.TestCase):
+    """fingerprint groups queries by shape and accepts any argument."""
+
+    def test_literals_stripped(self):
+        self.assertEqual(fingerprint("SELECT * FROM users WHERE id IN (1, 2, 3) AND name = 'x'"),
+                         "select * from users where id in (?) and name = ?")
+
+    def test_unhashable_argument(self):
+        self.assertEqual(fingerprint([1, 2]), "[1, 2]")
+
+
+class TestProfileQueries(unittest.TestCase):
+    """Profiling never costs the caller the wrapped function's result."""
+
+    def test_unhashable_first_argument(self):
+        profiler = QueryProfiler(sample_rate=1.0, logger=logging.getLogger("test_query_profiler"))
+        wrapped = profile_queries(lambda ids: [1], profiler)
+        self.assertEqual(wrapped([1, 2]), [1])
+        self.assertEqual(profiler.top_slowest(1)[0]["fingerprint"], "[1, 2]")
+
+
+if __name__ == "__main__":
+    unittest.main()
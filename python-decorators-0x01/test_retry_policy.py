@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Unit tests for retry_policy.CircuitBreaker used through retry_on_failure."""
+
+import asyncio
+import sqlite3
+import unittest
+
+from retry_policy import CircuitBreaker, CircuitOpenError
+
+retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+
+
+def half_open_breaker():
+    """A breaker that has just moved from open to half-open."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+class TestHalfOpenTrials(unittest.TestCase):
+    """A trial call that ends without an outcome gives its slot back."""
+
+    def test_cancelled_async_trial(self):
+        breaker = half_open_breaker()
+
+        @retry_on_failure(retries=1, breaker=breaker)
+        async def slow():
+            await asyncio.sleep(10)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(slow(), 0.01))
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        # The next call is let through as a new trial
+        breaker.before_call()
+
+    def test_interrupted_sync_trial(self):
+        breaker = half_open_breaker()
+
+        @retry_on_failure(retries=1, breaker=breaker)
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            interrupted()
+        breaker.before_call()
+
+    def test_trial_outcome_still_recorded(self):
+        breaker = half_open_breaker()
+        breaker.recovery_timeout = 60
+
+        @retry_on_failure(retries=1, breaker=breaker)
+        def locked():
+            raise sqlite3.OperationalError("database is locked")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            locked()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Unit tests for shared_cache.SharedQueryCache and TieredCache."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import cache_layer
+from cache_layer import QueryCache, current_generation, set_if_fresh
+from shared_cache import SharedQueryCache, TieredCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def in_other_process(path, code):
+    """Runs code with `cache` bound to a SharedQueryCache on path, in a new interpreter."""
+    script = f"from shared_cache import SharedQueryCache\ncache = SharedQueryCache({path!r})\n{code}"
+    done = subprocess.run([sys.executable, "-c", script], cwd=HERE, check=True,
+                          capture_output=True, text=True)
+    return done.stdout.strip()
+
+
+class TestCrossProcessInvalidation(unittest.TestCase):
+    """Invalidations made by another process reach both tiers."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.shared = SharedQueryCache(self.path)
+        self.cache = TieredCache(QueryCache(), self.shared)
+
+    def tearDown(self):
+        self.shared.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_local_tier_dropped(self):
+        self.cache.set("k", ["old row"], tables={"users"})
+        self.assertEqual(self.cache.get("k"), ["old row"])
+        in_other_process(self.path, "cache.invalidate_tables(['users'])")
+        self.assertIsNone(self.cache.get("k"))
+
+    def test_read_racing_other_process_not_stored(self):
+        generation = current_generation(self.cache)
+        # Another worker commits a write to users while our query runs
+        in_other_process(self.path, "cache.invalidate_tables(['users'])")
+        self.assertFalse(set_if_fresh(self.cache, "k", ["old row"], generation, tables={"users"}))
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(in_other_process(self.path, "print(cache.get('k'))"), "None")
+
+    def test_fresh_read_stored(self):
+        generation = current_generation(self.cache)
+        in_other_process(self.path, "cache.invalidate_tables(['posts'])")
+        self.assertTrue(set_if_fresh(self.cache, "k", ["row"], generation, tables={"users"}))
+        self.assertEqual(in_other_process(self.path, "print(cache.get('k'))"), "['row']")
+
+    def test_read_racing_this_process_not_stored(self):
+        generation = current_generation(self.cache)
+        cache_layer.invalidate_tables({"users"})
+        self.assertFalse(set_if_fresh(self.cache, "k", ["old row"], generation, tables={"users"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Unit tests for singleflight.AsyncSingleFlight."""
+
+import asyncio
+import unittest
+
+from singleflight import AsyncSingleFlight
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    """Cancelling one caller only affects that caller."""
+
+    def test_leader_cancelled_follower_completes(self):
+        async def scenario():
+            flight = AsyncSingleFlight()
+            runs = []
+
+            async def query():
+                runs.append(1)
+                await asyncio.sleep(0.05)
+                return "rows"
+
+            leader = asyncio.ensure_future(flight.do("k", query))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", query))
+            await asyncio.sleep(0)
+            leader.cancel()
+            self.assertEqual(await follower, "rows")
+            self.assertTrue(leader.cancelled())
+            self.assertEqual(len(runs), 1)
+
+        asyncio.run(scenario())
+
+    def test_last_waiter_cancelled_cancels_call(self):
+        async def scenario():
+            flight = AsyncSingleFlight()
+            started = asyncio.Event()
+            cancelled = asyncio.Event()
+
+            async def query():
+                started.set()
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+            caller = asyncio.ensure_future(flight.do("k", query))
+            await started.wait()
+            caller.cancel()
+            await asyncio.wait_for(cancelled.wait(), 1)
+            await asyncio.sleep(0)
+            self.assertEqual(flight._calls, {})
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,31 +2,22 @@
 
 import mysql.connector
 
-# Database connection parameters - make sure these match your MySQL setup
-# !!! IMPORTANT: Replace with your actual MySQL credentials and host !!!
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASSWORD = "Divinity:100"
-DB_NAME = "ALX_prodev"
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import close_cursor, get_pool
 
 def stream_users():
     """
     Generator function to stream rows from the user_data table one by one.
-    Connects to the ALX_prodev database and yields rows as dictionaries.
+    Checks a connection out of the shared pool and yields rows as dictionaries.
     Uses a single loop as required.
     """
+    pool = get_pool()
     connection = None # Initialize connection
     cursor = None     # Initialize cursor
 
     try:
-        # Connect to the database
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        # print("Connected to database for streaming.") # Optional debug print
+        # Check a connection out of the pool
+        connection = pool.checkout()
 
         # Create a cursor. buffered=False is crucial for streaming large datasets.
         # dictionary=True makes rows dictionaries.
@@ -48,10 +39,9 @@ def stream_users():
         print(f"An unexpected error occurred during streaming: {e}")
         # Catch other potential errors
     finally:
-        # Ensure cursor and connection are closed in the finally block
+        # Ensure the cursor is closed and the connection goes back to the pool
         if cursor is not None:
-            cursor.close()
+            close_cursor(cursor)
             # print("Database cursor closed.") # Optional debug print
-        if connection is not None and connection.is_connected():
-            connection.close()
-            # print("Database connection closed.") # Optional debug print
+        if connection is not None:
+            pool.checkin(connection)
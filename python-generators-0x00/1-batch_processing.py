@@ -3,50 +3,70 @@
 import mysql.connector
 # No need for itertools or sys in this specific file, they are used by 2-main.py
 
-# Database connection parameters - make sure these match your MySQL setup
-# !!! IMPORTANT: Replace with your actual MySQL credentials and host !!!
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASSWORD = "Divinity:100"
-DB_NAME = "ALX_prodev"
-
-def stream_users_in_batches(batch_size):
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import close_cursor, get_pool
+from user_filters import compile_filters, row_matches
+from user_rows import ROW_FORMATS, UserColumns, UserRecord, value_getter
+
+# The compact formats cast age to an integer on the server: DECIMAL(5,0) is
+# always integral and plain ints are far cheaper than Decimal objects
+DICT_QUERY = "SELECT user_id, name, email, age FROM user_data"
+COMPACT_QUERY = "SELECT user_id, name, email, CAST(age AS SIGNED) FROM user_data"
+
+# The filter batch_processing applies when none is given
+DEFAULT_FILTERS = [("age", ">", 25)]
+
+def stream_users_in_batches(batch_size, row_format="dict", where="", params=()):
     """
     Generator function to stream rows from the user_data table in batches.
-    Connects to the ALX_prodev database and yields lists of rows (batches).
+    Checks a connection out of the shared pool and yields lists of rows (batches).
     Uses 1 loop.
+
+    row_format selects how each batch is represented:
+    - "dict":     list of dictionaries (the original behaviour)
+    - "tuple":    list of (user_id, name, email, age) tuples
+    - "record":   list of slotted UserRecord objects
+    - "columnar": one UserColumns object with an array of ages
+    The compact formats never build per-row dictionaries and return age as int.
+
+    where/params are an optional parameterized WHERE clause (as produced by
+    user_filters.compile_filters) appended to the query.
     """
     if not isinstance(batch_size, int) or batch_size <= 0:
         print("Batch size must be a positive integer.")
         return # Exit the generator if batch_size is invalid
 
+    if row_format not in ROW_FORMATS:
+        print(f"Unknown row format: {row_format!r}. Choose from {ROW_FORMATS}.")
+        return
+
+    pool = get_pool()
     connection = None # Initialize connection
     cursor = None     # Initialize cursor
 
     try:
-        # Connect to the database
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        # print("Connected to database for batch streaming.") # Optional debug print
+        # Check a connection out of the pool
+        connection = pool.checkout()
 
         # Create a cursor. buffered=False is good practice for potentially large results.
-        # dictionary=True makes rows dictionaries.
-        cursor = connection.cursor(dictionary=True, buffered=False)
+        # dictionary=True makes rows dictionaries; the compact formats read plain tuples.
+        as_dict = row_format == "dict"
+        cursor = connection.cursor(dictionary=as_dict, buffered=False)
 
         # Execute the query to select all users
-        query = "SELECT user_id, name, email, age FROM user_data"
-        cursor.execute(query)
+        query = (DICT_QUERY if as_dict else COMPACT_QUERY) + where
+        cursor.execute(query, tuple(params))
 
         # Loop 1: Fetch and yield batches
         while True:
             batch = cursor.fetchmany(batch_size) # Fetch batch_size rows
             if not batch: # fetchmany returns an empty list when no more rows
                 break
-            yield batch # Yield the current batch (a list of dictionaries)
+            if row_format == "record":
+                batch = [UserRecord.from_tuple(row) for row in batch]
+            elif row_format == "columnar":
+                batch = UserColumns.from_tuples(batch)
+            yield batch # Yield the current batch in the requested format
 
     except mysql.connector.Error as err:
         print(f"Database error during batch streaming: {err}")
@@ -55,31 +75,57 @@ def stream_users_in_batches(batch_size):
         print(f"An unexpected error occurred during batch streaming: {e}")
         # Catch other potential errors
     finally:
-        # Ensure cursor and connection are closed
+        # Ensure the cursor is closed and the connection goes back to the pool
         if cursor is not None:
-            cursor.close()
+            close_cursor(cursor)
             # print("Database cursor closed.") # Optional debug print
-        if connection is not None and connection.is_connected():
-            connection.close()
-            # print("Database connection closed.") # Optional debug print
+        if connection is not None:
+            pool.checkin(connection)
 
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, row_format="dict", filters=None):
     """
     Generator function that uses stream_users_in_batches to fetch data,
-    processes each batch to filter users over the age of 25,
-    and yields the filtered user dictionaries one by one.
+    processes each batch to filter users (by default those over the age of 25),
+    and yields the filtered users one by one.
     Uses 2 loops internally (nested).
     Total loops in this script (including stream_users_in_batches) is 1 + 2 = 3.
+
+    filters is a list of (column, operator, value) tuples, e.g.
+    [("age", ">", 25), ("email", "like", "%@gmail.com")]. Everything SQL can
+    express is compiled into a parameterized WHERE clause so MySQL never
+    sends the rows we would discard; only Python-only predicates (see
+    user_filters) are checked here.
+
+    row_format is passed to stream_users_in_batches and decides what is
+    yielded: dictionaries, tuples or UserRecords. With "columnar" the Python
+    predicates run over each batch's columns and only the matching rows are
+    turned into UserRecords.
     """
+    if filters is None:
+        filters = DEFAULT_FILTERS
+
+    try:
+        where, params, python_predicates = compile_filters(filters)
+    except (ValueError, TypeError) as e:
+        print(f"Invalid filter: {e}")
+        return
+
+    get_value = None if row_format == "columnar" else value_getter(row_format)
+
     # Loop 2: Iterate over batches provided by the stream_users_in_batches generator
-    for batch in stream_users_in_batches(batch_size):
-        # Loop 3: Iterate over individual user dictionaries within the current batch
+    for batch in stream_users_in_batches(batch_size, row_format, where, params):
+        if row_format == "columnar":
+            # Filter column by column first, then build records for the survivors only
+            for column, function, value in python_predicates:
+                batch = batch.take(batch.indices_where(column, lambda v: function(v, value)))
+            batch = batch.records()
+        elif python_predicates:
+            batch = [user for user in batch if row_matches(user, python_predicates, get_value)]
+
+        # Loop 3: Iterate over individual users within the current (already filtered) batch
         for user in batch:
-            # Process/Filter the user: check if age is greater than 25
-            # Ensure 'age' exists and is comparable (mysql.connector usually handles DECIMAL)
-            if user.get('age') is not None and user['age'] > 25:
-                yield user # Yield the single, filtered user dictionary
+            yield user # Yield the single, filtered user
 
 # Note: The 2-main.py script will import and use the batch_processing function.
 # No __main__ block needed in this file for the specified task structure.
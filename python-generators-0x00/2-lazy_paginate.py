@@ -1,37 +1,98 @@
 #!/usr/bin/python3
 
-# We need the seed script to get the database connection function
-seed = __import__('seed')
+import base64
+import binascii
+import queue
+import threading
+import mysql.connector
 
-def paginate_users(page_size, offset):
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import get_pool
+
+# Prefix stored inside every cursor token so stale or foreign tokens are rejected
+CURSOR_TOKEN_VERSION = "v1:"
+
+
+class Page(list):
     """
-    Fetches a single page of user data from the database.
-    This function is provided as a helper.
+    A page of user dictionaries (behaves exactly like a list).
+    In keyset mode, next_cursor holds the token that resumes the scan
+    right after the last row of this page.
     """
-    connection = None # Initialize connection
-    cursor = None     # Initialize cursor
-    rows = []         # Initialize result list
 
+    def __init__(self, rows, next_cursor=None):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(user_id):
+    """Encodes the last user_id seen into an opaque, URL-safe cursor token."""
+    raw = (CURSOR_TOKEN_VERSION + str(user_id)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(token):
+    """
+    Decodes a cursor token produced by encode_cursor back into a user_id.
+    Raises ValueError if the token is malformed.
+    """
     try:
-        # Connect to the database using the function from seed.py
-        connection = seed.connect_to_prodev()
-        if connection is None:
-            print("Failed to connect to database for pagination.")
-            return [] # Return empty list if connection fails
+        raw = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')
+    except (binascii.Error, UnicodeError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor token: {token!r}") from e
+    if not raw.startswith(CURSOR_TOKEN_VERSION):
+        raise ValueError(f"Invalid cursor token: {token!r}")
+    return raw[len(CURSOR_TOKEN_VERSION):]
 
-        # Create a cursor
-        cursor = connection.cursor(dictionary=True)
 
-        # Execute the query with LIMIT and OFFSET
+def fetch_page(connection, page_size, mode="offset", offset=0, after_user_id=None):
+    """
+    Runs the query for one page on the given connection and returns its rows.
+    mode="offset" uses LIMIT/OFFSET; mode="keyset" returns the rows whose
+    user_id sorts after after_user_id, in user_id order. The PRIMARY KEY
+    index on user_id lets MySQL seek straight to the start of a keyset page,
+    so its cost does not grow with how deep the scan is.
+    Database errors are raised to the caller.
+    """
+    cursor = connection.cursor(dictionary=True)
+    try:
         # Basic validation for page_size and offset for safety
         safe_page_size = max(1, int(page_size)) # Ensure page_size is at least 1
-        safe_offset = max(0, int(offset))       # Ensure offset is not negative
 
-        query = f"SELECT user_id, name, email, age FROM user_data LIMIT {safe_page_size} OFFSET {safe_offset}"
-        cursor.execute(query)
+        if mode == "offset":
+            safe_offset = max(0, int(offset))   # Ensure offset is not negative
+            query = "SELECT user_id, name, email, age FROM user_data LIMIT %s OFFSET %s"
+            cursor.execute(query, (safe_page_size, safe_offset))
+        elif after_user_id is None:
+            # First keyset page: nothing to seek past yet
+            query = "SELECT user_id, name, email, age FROM user_data ORDER BY user_id LIMIT %s"
+            cursor.execute(query, (safe_page_size,))
+        else:
+            query = ("SELECT user_id, name, email, age FROM user_data "
+                     "WHERE user_id > %s ORDER BY user_id LIMIT %s")
+            cursor.execute(query, (after_user_id, safe_page_size))
+
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def paginate_users(page_size, offset, connection=None):
+    """
+    Fetches a single page of user data from the database.
+    This function is provided as a helper.
+    If a connection is passed in it is reused and left open for the caller.
+    """
+    owns_connection = connection is None # Only return connections we checked out
+    pool = get_pool()
+    rows = []         # Initialize result list
 
-        # Fetch all rows for the current page
-        rows = cursor.fetchall()
+    try:
+        # Check a connection out of the shared pool
+        if owns_connection:
+            connection = pool.checkout()
+
+        # Execute the query with LIMIT and OFFSET and fetch all rows for the current page
+        rows = fetch_page(connection, page_size, "offset", offset)
 
     except mysql.connector.Error as err:
         print(f"Database error during pagination: {err}")
@@ -41,42 +102,187 @@ def paginate_users(page_size, offset):
         print(f"An unexpected error occurred during pagination: {e}")
         rows = []
     finally:
-        # Ensure cursor and connection are closed
-        if cursor is not None:
-            cursor.close()
-            # print("Database cursor closed.") # Optional debug print
-        if connection is not None and connection.is_connected():
-            connection.close()
-            # print("Database connection closed.") # Optional debug print
+        # Ensure the connection goes back to the pool
+        if owns_connection and connection is not None:
+            pool.checkin(connection)
+            # print("Database connection returned to pool.") # Optional debug print
 
     return rows
 
-def lazy_pagination(page_size):
+def paginate_users_after(page_size, after_user_id=None, connection=None):
+    """
+    Fetches a single page of user data using keyset (seek) pagination.
+    Returns the rows whose user_id sorts after after_user_id, in user_id order.
+    If a connection is passed in it is reused and left open for the caller.
+    """
+    owns_connection = connection is None # Only return connections we checked out
+    pool = get_pool()
+    rows = []
+
+    try:
+        if owns_connection:
+            connection = pool.checkout()
+
+        rows = fetch_page(connection, page_size, "keyset", after_user_id=after_user_id)
+
+    except mysql.connector.Error as err:
+        print(f"Database error during keyset pagination: {err}")
+        rows = []
+    except Exception as e:
+        print(f"An unexpected error occurred during keyset pagination: {e}")
+        rows = []
+    finally:
+        if owns_connection and connection is not None:
+            pool.checkin(connection)
+
+    return rows
+
+def iter_pages(page_size, mode="offset", after_user_id=None):
+    """
+    Generator yielding every Page of user_data over one pooled connection,
+    which is returned when the generator is exhausted or closed.
+    Unlike lazy_pagination, errors are raised rather than printed.
+    """
+    pool = get_pool()
+    connection = pool.checkout()
+    offset = 0 # Start at the beginning
+
+    try:
+        while True:
+            current_page = fetch_page(connection, page_size, mode, offset, after_user_id)
+
+            # If the fetched page is empty, it means there are no more pages
+            if not current_page:
+                break
+
+            if mode == "keyset":
+                # Remember where this page ended so the next one seeks past it
+                after_user_id = current_page[-1]['user_id']
+                yield Page(current_page, encode_cursor(after_user_id))
+            else:
+                # Yield the fetched page (which is a list of user dictionaries)
+                yield Page(current_page)
+
+            # Increment the offset for the next potential page fetch
+            offset += page_size
+    finally:
+        pool.checkin(connection)
+
+def read_ahead_pages(pages, read_ahead):
+    """
+    Generator that drains the iterator `pages` in a background thread,
+    keeping at most read_ahead pages queued ahead of the consumer.
+    - Back-pressure: the thread blocks while the queue is full.
+    - Cancellation: closing this generator stops the thread and closes
+      `pages` (returning its connection) before close() returns.
+    - Errors raised while fetching are re-raised in the consumer.
+    """
+    page_queue = queue.Queue(maxsize=read_ahead)
+    stop = threading.Event()
+
+    def put(item):
+        # Block while the queue is full, but give up as soon as the consumer is gone
+        while not stop.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_END_OF_PAGES)
+        except BaseException as e:
+            put(_FetchError(e))
+        finally:
+            pages.close()
+
+    thread = threading.Thread(target=worker, name="lazy-pagination-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = page_queue.get()
+            if item is _END_OF_PAGES:
+                break
+            if isinstance(item, _FetchError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+class _FetchError:
+    """Carries an exception from the read-ahead thread to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+_END_OF_PAGES = object()
+
+def lazy_pagination(page_size, mode="offset", cursor=None, read_ahead=0):
     """
     Generator function to fetch and yield database pages lazily.
     Fetches the next page only when requested by the caller.
     Uses only one loop and the yield generator.
+
+    mode="offset" keeps the original LIMIT/OFFSET behaviour.
+    mode="keyset" seeks past the last user_id seen instead, so every page
+    costs the same no matter how deep the scan goes. Each yielded Page then
+    carries a next_cursor token; pass it back as cursor= to resume the scan
+    later (for example after a restart).
+    One pooled connection is held for the whole scan and returned when the
+    generator is exhausted or closed.
+
+    read_ahead=K (opt-in) fetches up to K pages in a background thread
+    while the caller is still busy with the current one. In that mode
+    database errors are raised to the caller instead of ending the scan
+    with a printed message.
     """
     if not isinstance(page_size, int) or page_size <= 0:
         print("Page size must be a positive integer.")
         return # Exit the generator if page_size is invalid
 
-    offset = 0 # Start at the beginning
+    if mode not in ("offset", "keyset"):
+        print(f"Unknown pagination mode: {mode!r}. Use 'offset' or 'keyset'.")
+        return
 
-    # This is the ONLY loop allowed in this generator function
-    while True:
-        # Fetch the current page using the helper function
-        current_page = paginate_users(page_size, offset)
+    if cursor is not None and mode != "keyset":
+        print("A cursor token can only be used with mode='keyset'.")
+        return
 
-        # If the fetched page is empty, it means there are no more pages
-        if not current_page:
-            break # Exit the loop (and thus the generator)
+    if not isinstance(read_ahead, int) or read_ahead < 0:
+        print("read_ahead must be a non-negative integer.")
+        return
 
-        # Yield the fetched page (which is a list of user dictionaries)
-        yield current_page
+    after_user_id = None
+    if cursor is not None:
+        try:
+            after_user_id = decode_cursor(cursor)
+        except ValueError as e:
+            print(e)
+            return
 
-        # Increment the offset for the next potential page fetch
-        offset += page_size
+    pages = iter_pages(page_size, mode, after_user_id)
+
+    if read_ahead:
+        yield from read_ahead_pages(pages, read_ahead)
+        return
+
+    try:
+        # This is the ONLY loop allowed in this generator function
+        for current_page in pages:
+            yield current_page
+    except mysql.connector.Error as err:
+        print(f"Database error during pagination: {err}")
+    except Exception as e:
+        print(f"An unexpected error occurred during pagination: {e}")
+    finally:
+        # Returns the connection when the generator is exhausted or closed early
+        pages.close()
 
 # Note: The 3-main.py script will import and use the lazy_pagination function.
 # No __main__ block needed in this file for the specified task structure.
@@ -1,42 +1,25 @@
 #!/usr/bin/python3
 
 import mysql.connector
-# Assuming seed.py contains connect_to_prodev() and database credentials
-# We try to import it, providing a fallback if it's missing or incomplete.
-try:
-    seed = __import__('seed')
-    connect_to_prodev = seed.connect_to_prodev
-except ImportError:
-    print("Error: seed.py not found. Please ensure seed.py exists and contains connect_to_prodev function.")
-    # Define a dummy function or exit if seed is essential
-    def connect_to_prodev():
-        print("Dummy connection function called (seed.py not found). Cannot connect.")
-        return None
-    # exit(1) # Uncomment this line if the script must exit if seed.py is missing
-except AttributeError:
-    print("Error: connect_to_prodev function not found in seed.py.")
-    # Define a dummy function or exit if connect_to_prodev is missing
-    def connect_to_prodev():
-        print("Dummy connection function called (connect_to_prodev not found). Cannot connect.")
-        return None
-    # exit(1) # Uncomment this line if the script must exit
+
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import close_cursor, get_pool
+from user_aggregates import aggregate_user_data
 
 
 def stream_user_ages():
     """
     Generator function to stream user ages one by one from the database.
-    Connects to the ALX_prodev database and yields individual age values.
+    Checks a connection out of the shared pool and yields individual age values.
     Uses 1 loop.
     """
+    pool = get_pool()
     connection = None
     cursor = None
 
     try:
-        # Connect to the database using the function from seed.py
-        connection = connect_to_prodev()
-        if connection is None:
-            # The dummy function will print an error, just return to exit the generator
-            return
+        # Check a connection out of the pool
+        connection = pool.checkout()
 
         # Create a cursor. buffered=False is crucial for streaming large datasets.
         # dictionary=True makes rows dictionaries, easy to access by column name.
@@ -69,36 +52,36 @@ def stream_user_ages():
         print(f"An unexpected error occurred during age streaming: {e}")
         # Catch other potential errors
     finally:
-        # Ensure cursor and connection are closed in the finally block
+        # Ensure the cursor is closed and the connection goes back to the pool
         if cursor is not None:
-            cursor.close()
+            close_cursor(cursor)
             # print("Database cursor closed.") # Optional debug print
-        if connection is not None and connection.is_connected():
-            connection.close()
-            # print("Database connection closed.") # Optional debug print
+        if connection is not None:
+            pool.checkin(connection)
 
 
-def calculate_average_age():
+def calculate_average_age(pushdown=True):
     """
-    Calculates the average age of users by consuming the stream_user_ages
-    generator without loading all ages into memory.
-    Uses 1 loop. Total loops in script: 1 (in stream_user_ages) + 1 (here) = 2.
+    Calculates the average age of users without loading all ages into memory.
+    By default MySQL computes AVG(age) itself, so a single row crosses the
+    wire. With pushdown=False (or if the server-side query fails) the ages
+    are streamed as plain tuples in large blocks and averaged in Python.
+    See user_aggregates.aggregate_user_data for the other statistics.
     """
-    total_age_sum = 0.0 # Use float for sum to ensure float division later
-    user_count = 0
-
-    # Loop 2 (within this function): Consume the generator stream_user_ages
-    # This loop iterates over the individual age values yielded by the generator
-    for age in stream_user_ages():
-        total_age_sum += age
-        user_count += 1
+    try:
+        result = aggregate_user_data("age", metrics=("mean",), pushdown=pushdown)
+    except mysql.connector.Error as err:
+        print(f"Database error while averaging ages: {err}")
+        return 0.0
+    except Exception as e:
+        print(f"An unexpected error occurred while averaging ages: {e}")
+        return 0.0
 
-    # Avoid division by zero in case no users were found or streamed
-    if user_count == 0:
+    # Avoid division by zero in case no users were found
+    if result['mean'] is None:
         return 0.0 # Return 0.0 or handle as appropriate if no data
 
-    # Calculate the average
-    return total_age_sum / user_count
+    return result['mean']
 
 
 # Main execution block to call the calculation and print the result
@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+
+import asyncio
+
+import aiomysql
+
+seed = __import__('seed')
+lazy_paginate = __import__('2-lazy_paginate') # Page and cursor-token helpers
+
+# Batches kept ready ahead of the consumer by default
+DEFAULT_PREFETCH = 2
+
+# Marks the end of a prefetch queue
+_DONE = object()
+
+_pool = None
+_pool_loop = None
+_pool_lock = None
+
+
+async def get_async_pool(maxsize=5):
+    """
+    Returns the aiomysql pool for the ALX_prodev database, creating it on
+    first use in the running event loop with the credentials from seed.py.
+    """
+    global _pool, _pool_loop, _pool_lock
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        # Pools and locks are bound to the loop that created them
+        _pool, _pool_loop, _pool_lock = None, loop, asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await aiomysql.create_pool(
+                host=seed.DB_HOST,
+                user=seed.DB_USER,
+                password=seed.DB_PASSWORD,
+                db=seed.DB_NAME,
+                maxsize=maxsize,
+                autocommit=True,
+            )
+    return _pool
+
+
+async def close_async_pool():
+    """Closes the pool created by get_async_pool, if any."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+async def _prefetch(produce, prefetch):
+    """
+    Runs the async generator `produce` in a background task that stays up
+    to `prefetch` items ahead of the consumer, so the next batch is already
+    being fetched while the current one is processed. The bounded queue
+    provides back-pressure, errors are re-raised in the consumer, and
+    closing the consumer early cancels the producer.
+    """
+    if not isinstance(prefetch, int) or prefetch < 0:
+        raise ValueError("prefetch must be a non-negative integer.")
+
+    if prefetch == 0:
+        # No read-ahead: fetch strictly on demand
+        async for item in produce:
+            yield item
+        return
+
+    queue = asyncio.Queue(maxsize=prefetch)
+
+    async def producer():
+        try:
+            async for item in produce:
+                await queue.put(item)
+            await queue.put(_DONE)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(producer())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await produce.aclose()
+
+
+async def _fetch_batches(query, params, batch_size, cursor_class=aiomysql.SSDictCursor):
+    """
+    Async generator yielding fetchmany batches of query on a pooled connection.
+    If the stream is closed or cancelled before the end, the connection is
+    closed rather than reused: closing an unbuffered cursor would first read
+    every remaining row from the server.
+    """
+    pool = await get_async_pool()
+    connection = await pool.acquire()
+    finished = False
+    try:
+        cursor = await connection.cursor(cursor_class)
+        await cursor.execute(query, params)
+        while True:
+            batch = await cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield list(batch)
+        await cursor.close()
+        finished = True
+    finally:
+        if not finished:
+            connection.close() # Drops the socket; the unread rows are never transferred
+        await pool.release(connection)
+
+
+async def stream_users_in_batches_async(batch_size, prefetch=DEFAULT_PREFETCH):
+    """
+    Async counterpart of stream_users_in_batches: yields lists of user
+    dictionaries without blocking the event loop.
+    """
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer.")
+
+    query = "SELECT user_id, name, email, age FROM user_data"
+    async for batch in _prefetch(_fetch_batches(query, (), batch_size), prefetch):
+        yield batch
+
+
+async def stream_users_async(batch_size=1000, prefetch=DEFAULT_PREFETCH):
+    """
+    Async counterpart of stream_users: yields user dictionaries one by one.
+    Rows are still read from the server batch_size at a time.
+    """
+    async for batch in stream_users_in_batches_async(batch_size, prefetch):
+        for row in batch:
+            yield row
+
+
+async def stream_user_ages_async(batch_size=1000, prefetch=DEFAULT_PREFETCH):
+    """Async counterpart of stream_user_ages: yields ages as floats."""
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer.")
+
+    query = "SELECT age FROM user_data"
+    batches = _fetch_batches(query, (), batch_size, aiomysql.SSCursor) # Plain tuples are enough here
+    async for batch in _prefetch(batches, prefetch):
+        for (age,) in batch:
+            yield float(age)
+
+
+async def _fetch_pages(page_size, mode, after_user_id):
+    """Async generator of pages, holding one pooled connection for the whole scan."""
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        offset = 0
+        while True:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                if mode == "offset":
+                    await cursor.execute(
+                        "SELECT user_id, name, email, age FROM user_data LIMIT %s OFFSET %s",
+                        (page_size, offset)
+                    )
+                elif after_user_id is None:
+                    await cursor.execute(
+                        "SELECT user_id, name, email, age FROM user_data ORDER BY user_id LIMIT %s",
+                        (page_size,)
+                    )
+                else:
+                    await cursor.execute(
+                        "SELECT user_id, name, email, age FROM user_data "
+                        "WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                        (after_user_id, page_size)
+                    )
+                rows = await cursor.fetchall()
+
+            if not rows:
+                break
+
+            if mode == "keyset":
+                after_user_id = rows[-1]['user_id']
+                yield lazy_paginate.Page(rows, lazy_paginate.encode_cursor(after_user_id))
+            else:
+                yield lazy_paginate.Page(rows)
+            offset += page_size
+
+
+async def lazy_pagination_async(page_size, mode="offset", cursor=None, prefetch=1):
+    """
+    Async counterpart of lazy_pagination, with the same offset/keyset modes
+    and cursor tokens. With prefetch > 0 the next page is requested while
+    the consumer is still working on the current one.
+    """
+    if not isinstance(page_size, int) or page_size <= 0:
+        raise ValueError("Page size must be a positive integer.")
+    if mode not in ("offset", "keyset"):
+        raise ValueError(f"Unknown pagination mode: {mode!r}. Use 'offset' or 'keyset'.")
+    if cursor is not None and mode != "keyset":
+        raise ValueError("A cursor token can only be used with mode='keyset'.")
+
+    after_user_id = lazy_paginate.decode_cursor(cursor) if cursor is not None else None
+    async for page in _prefetch(_fetch_pages(page_size, mode, after_user_id), prefetch):
+        yield page
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""
+Compares batch_processing with its age filter pushed down into SQL against
+the same filter evaluated in Python, at several selectivities.
+
+Selectivity thresholds come from the age percentiles of user_data, and the
+bytes column is the server's Bytes_sent counter for the session, i.e. what
+actually crossed the wire. Seed user_data (see benchmark_seed.py) with
+enough rows for the timings to be meaningful.
+
+Usage: ./benchmark_filters.py [--batch-size N]
+"""
+
+import argparse
+import operator
+import time
+
+import connection_pool
+from user_aggregates import aggregate_user_data
+
+batch_processing = __import__('1-batch_processing')
+
+# Fraction of rows expected to pass the filter
+SELECTIVITIES = (0.01, 0.10, 0.50, 0.90, 1.00)
+
+
+def bytes_sent(pool):
+    """Reads the server-side Bytes_sent counter of the pool's only connection."""
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+    return value
+
+
+def measure(pool, batch_size, filters):
+    """Runs batch_processing to completion; returns (rows, bytes, seconds)."""
+    before = bytes_sent(pool)
+    started = time.perf_counter()
+    rows = sum(1 for _ in batch_processing.batch_processing(batch_size, "tuple", filters))
+    elapsed = time.perf_counter() - started
+    return rows, bytes_sent(pool) - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per fetchmany (default 1000)")
+    args = parser.parse_args()
+
+    # A single pooled connection, so every query and every Bytes_sent reading share one session
+    pool = connection_pool.get_pool(max_size=1)
+
+    percentiles = [100 * (1 - selectivity) for selectivity in SELECTIVITIES]
+    thresholds = aggregate_user_data("age", metrics=("count",), percentiles=percentiles)['percentiles']
+
+    print(f"{'selectivity':>11} {'age >':>6} {'mode':>8} {'rows':>10} {'bytes':>14} {'time':>9}")
+    for selectivity, percentile in zip(SELECTIVITIES, percentiles):
+        # Just below the percentile so roughly `selectivity` of the rows satisfy age > threshold
+        threshold = thresholds[percentile] - 0.5
+        for mode, filters in (("sql", [("age", ">", threshold)]),
+                              ("python", [("age", operator.gt, threshold)])):
+            rows, sent, elapsed = measure(pool, args.batch_size, filters)
+            print(f"{selectivity:>11.0%} {threshold:>6.1f} {mode:>8} {rows:>10} {sent:>14,} {elapsed:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
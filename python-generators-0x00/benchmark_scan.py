@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""
+Compares a full scan of user_data through the single-cursor stream_users()
+generator with partitioned_scan() in ordered and unordered mode.
+
+Seed user_data (see benchmark_seed.py) with enough rows for the timings to
+be meaningful.
+
+Usage: ./benchmark_scan.py [--partitions N ...] [--batch-size N]
+"""
+
+import argparse
+import time
+
+import connection_pool
+from partitioned_scan import partitioned_scan
+
+stream_users = __import__('0-stream_users')
+
+
+def timed(label, rows):
+    """Drains the row iterator and prints its throughput."""
+    started = time.perf_counter()
+    count = sum(1 for _ in rows)
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{label:<34} {count:>10} rows {elapsed:>9.2f}s {rate:>12.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[2, 4, 8],
+                        help="partition counts to try (default 2 4 8)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per fetchmany (default 1000)")
+    args = parser.parse_args()
+
+    # Enough connections for the widest scan, created before anything else uses the pool
+    connection_pool.get_pool(max_size=max(args.partitions))
+
+    timed("stream_users (1 cursor)", stream_users.stream_users())
+    for partitions in args.partitions:
+        for ordered in (True, False):
+            label = f"partitioned_scan {partitions} {'ordered' if ordered else 'unordered'}"
+            timed(label, partitioned_scan(partitions, ordered=ordered, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Benchmarks the CSV seeding paths of seed.py against a synthetic file built
+by scaling up the bundled data.csv.
+
+Every run gets its own freshly generated file (new user_id values) so
+INSERT IGNORE never skips rows inserted by a previous run. Point seed.py
+at a scratch database: the benchmark adds rows to user_data.
+
+Usage: ./benchmark_seed.py [--scale N] [--writers N] [--parsers N]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import uuid
+
+seed = __import__('seed')
+parallel_seed = __import__('parallel_seed')
+
+SOURCE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def make_synthetic_csv(scale, directory):
+    """
+    Writes data.csv repeated `scale` times, with a fresh user_id on every
+    row, and returns the path and the number of data rows.
+    """
+    with open(SOURCE_CSV, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        template = [row for row in reader if row]
+
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with os.fdopen(fd, mode='w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f, lineterminator='\n')
+        out.writerow(header)
+        for _ in range(scale):
+            for row in template:
+                out.writerow([str(uuid.uuid4())] + row[1:])
+
+    return path, scale * len(template)
+
+
+def run(label, load, scale, directory):
+    """Times one loader on a fresh synthetic file and prints rows/second."""
+    path, rows = make_synthetic_csv(scale, directory)
+    try:
+        started = time.perf_counter()
+        load(path)
+        elapsed = time.perf_counter() - started
+    finally:
+        os.remove(path)
+    print(f"{label:<28} {rows:>10} rows {elapsed:>9.2f}s {rows / elapsed:>12.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10000, help="copies of data.csv to generate (default 10000)")
+    parser.add_argument("--writers", type=int, default=4, help="writer connections for the parallel pipeline")
+    parser.add_argument("--parsers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per commit for the streaming loader")
+    args = parser.parse_args()
+
+    connection = seed.connect_to_prodev()
+    if connection is None:
+        return
+    seed.create_table(connection)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'loader':<28} {'rows':>15} {'time':>10} {'throughput':>17}")
+        run("insert_data", lambda path: seed.insert_data(connection, path), args.scale, directory)
+        run("insert_data_streaming",
+            lambda path: seed.insert_data_streaming(connection, path, args.chunk_size, on_progress=None),
+            args.scale, directory)
+        run(f"parallel_seed ({args.writers} writers)",
+            lambda path: parallel_seed.parallel_seed(path, args.parsers, args.writers),
+            args.scale, directory)
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of MySQL connections.
+
+    - At most max_size connections exist at once; callers wait (up to
+      checkout_timeout seconds) when they are all in use.
+    - Every checkout pings the connection first and transparently replaces
+      it if the server dropped it.
+    - Connections that sat idle longer than idle_timeout seconds are closed
+      instead of being handed out again.
+    - stats() reports checkout latency and saturation counters.
+    """
+
+    def __init__(self, max_size=5, checkout_timeout=10.0, idle_timeout=300.0, **connect_kwargs):
+        if not isinstance(max_size, int) or max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.connect_kwargs = connect_kwargs
+
+        self._lock = threading.Condition()
+        self._idle = []        # (connection, returned_at) pairs, most recently returned last
+        self._in_use = 0       # Connections currently checked out
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+        self._saturated_checkouts = 0  # Checkouts that had to wait for a free connection
+        self._timeouts = 0
+        self._created = 0
+        self._evicted_idle = 0
+        self._evicted_unhealthy = 0
+
+    def _size(self):
+        return self._in_use + len(self._idle)
+
+    def _evict_idle(self, now):
+        """Closes idle connections past idle_timeout. Caller must hold the lock."""
+        if self.idle_timeout is None:
+            return
+        fresh = []
+        for connection, returned_at in self._idle:
+            if now - returned_at > self.idle_timeout:
+                self._evicted_idle += 1
+                _close_quietly(connection)
+            else:
+                fresh.append((connection, returned_at))
+        self._idle = fresh
+
+    def _is_healthy(self, connection):
+        """Pings the server; a connection that fails the ping is discarded."""
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def checkout(self):
+        """
+        Returns a healthy connection from the pool, opening a new one if the
+        pool is below max_size. Blocks while the pool is saturated and raises
+        PoolTimeoutError once checkout_timeout expires.
+        """
+        started = time.monotonic()
+        deadline = None if self.checkout_timeout is None else started + self.checkout_timeout
+        waited = False
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+
+                self._evict_idle(time.monotonic())
+
+                if self._idle:
+                    connection, _ = self._idle.pop() # Reuse the warmest connection
+                    self._in_use += 1
+                    break
+
+                if self._size() < self.max_size:
+                    connection = None # Reserve a slot and connect outside the lock
+                    self._in_use += 1
+                    break
+
+                # Pool is saturated: wait for a connection to be returned
+                if not waited:
+                    waited = True
+                    self._saturated_checkouts += 1
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"(pool size {self.max_size})."
+                    )
+                self._lock.wait(remaining)
+
+        try:
+            if connection is not None and not self._is_healthy(connection):
+                with self._lock:
+                    self._evicted_unhealthy += 1
+                _close_quietly(connection)
+                connection = None
+            if connection is None:
+                connection = mysql.connector.connect(**self.connect_kwargs)
+                with self._lock:
+                    self._created += 1
+        except Exception:
+            # Give the reserved slot back so other callers are not starved
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+        wait = time.monotonic() - started
+        with self._lock:
+            self._checkouts += 1
+            self._checkout_wait_total += wait
+            self._checkout_wait_max = max(self._checkout_wait_max, wait)
+        return connection
+
+    def checkin(self, connection):
+        """
+        Returns a connection to the pool. Any open transaction is rolled
+        back first. A connection that still has an unread result (a stream
+        closed early) is closed rather than drained: reading the rest of a
+        large result set just to reuse the connection costs far more than
+        opening a new one. Connections that cannot be reset are closed too.
+        """
+        reusable = True
+        try:
+            if not connection.is_connected() or getattr(connection, 'unread_result', False):
+                reusable = False
+            else:
+                connection.rollback()
+        except Exception:
+            reusable = False
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                _close_quietly(connection)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        connection = self.checkout()
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    def stats(self):
+        """Returns a snapshot of the pool's size, latency and saturation counters."""
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'saturation': self._in_use / self.max_size,
+                'checkouts': self._checkouts,
+                'checkout_wait_avg': (self._checkout_wait_total / self._checkouts) if self._checkouts else 0.0,
+                'checkout_wait_max': self._checkout_wait_max,
+                'saturated_checkouts': self._saturated_checkouts,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'evicted_idle': self._evicted_idle,
+                'evicted_unhealthy': self._evicted_unhealthy,
+            }
+
+    def close(self):
+        """Closes every idle connection; checked-out ones are closed on checkin."""
+        with self._lock:
+            self._closed = True
+            for connection, _ in self._idle:
+                _close_quietly(connection)
+            self._idle = []
+            self._lock.notify_all()
+
+
+def close_cursor(cursor):
+    """
+    Closes a cursor without reading the rows the caller left unread.
+    mysql.connector refuses to close a cursor with a pending result unless
+    it may drain it first; that refusal is ignored here, and checkin() then
+    closes the connection instead of returning it to the pool.
+    """
+    try:
+        cursor.close()
+    except mysql.connector.errors.InternalError:
+        pass
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(max_size=5):
+    """
+    Returns the process-wide pool for the ALX_prodev database, creating it on
+    first use with the credentials defined in seed.py. max_size only applies
+    to that first call.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            seed = __import__('seed') # Imported lazily: seed.py itself uses this module
+            _pool = ConnectionPool(
+                max_size=max_size,
+                host=seed.DB_HOST,
+                user=seed.DB_USER,
+                password=seed.DB_PASSWORD,
+                database=seed.DB_NAME,
+            )
+        return _pool
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+
+import csv
+import io
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import mysql.connector
+
+seed = __import__('seed')
+
+# Shards of roughly this many bytes are handed to each parser process
+DEFAULT_SHARD_BYTES = 8 * 1024 * 1024
+# Rows packed into one multi-row INSERT ... VALUES (...), (...) statement
+DEFAULT_ROWS_PER_STATEMENT = 500
+
+INSERT_PREFIX = "INSERT IGNORE INTO user_data (user_id, name, email, age) VALUES "
+ROW_PLACEHOLDER = "(%s, %s, %s, %s)"
+
+# Sentinel telling a writer thread there is no more work
+_STOP = object()
+
+
+def split_into_shards(csv_filepath, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Splits the CSV (minus its header) into (start, end) byte ranges of about
+    shard_bytes each. Every boundary is moved forward to the next newline so
+    no record is cut in half. Records must not contain embedded newlines,
+    which holds for the user_data exports.
+    """
+    file_size = os.path.getsize(csv_filepath)
+    shards = []
+
+    with open(csv_filepath, mode='rb') as csvfile:
+        csvfile.readline() # Skip the header row
+        start = csvfile.tell()
+
+        while start < file_size:
+            end = min(start + shard_bytes, file_size)
+            if end < file_size:
+                csvfile.seek(end)
+                csvfile.readline() # Finish the record the boundary landed in
+                end = csvfile.tell()
+            shards.append((start, end))
+            start = end
+
+    return shards
+
+
+def parse_shard(csv_filepath, start, end):
+    """
+    Runs in a worker process: reads one byte range of the CSV, parses and
+    validates its records and returns them as insertable tuples.
+    """
+    with open(csv_filepath, mode='rb') as csvfile:
+        csvfile.seek(start)
+        raw = csvfile.read(end - start)
+
+    rows = []
+    for record in csv.reader(io.StringIO(raw.decode('utf-8'))):
+        if not record:
+            continue # Blank line, e.g. a trailing newline
+        processed_row = seed.parse_user_row(record)
+        if processed_row is not None:
+            rows.append(processed_row)
+    return rows
+
+
+def build_insert_sql(row_count):
+    """Builds a multi-row INSERT IGNORE statement with row_count placeholders."""
+    return INSERT_PREFIX + ", ".join([ROW_PLACEHOLDER] * row_count)
+
+
+def writer(work_queue, rows_per_statement, results, errors, abort):
+    """
+    Writer thread: owns one database connection and inserts every batch of
+    rows it takes off work_queue with multi-row VALUES statements. On an
+    error it rolls back its shard, sets abort and stops taking work.
+    """
+    connection = None
+    cursor = None
+    written = 0
+    full_sql = build_insert_sql(rows_per_statement)
+
+    try:
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            raise RuntimeError("Writer could not connect to the database.")
+        cursor = connection.cursor()
+
+        while True:
+            rows = work_queue.get()
+            if rows is _STOP:
+                break
+
+            for i in range(0, len(rows), rows_per_statement):
+                statement_rows = rows[i:i + rows_per_statement]
+                sql = full_sql if len(statement_rows) == rows_per_statement else build_insert_sql(len(statement_rows))
+                params = [value for row in statement_rows for value in row] # Flatten for the placeholders
+                cursor.execute(sql, params)
+            connection.commit() # One transaction per shard
+            written += len(rows)
+
+    except Exception as e:
+        errors.append(e)
+        abort.set() # Tell the reader to stop parsing; the shards already queued go to the other writers
+        if connection is not None:
+            try:
+                connection.rollback()
+            except mysql.connector.Error:
+                pass
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if connection is not None and connection.is_connected():
+            connection.close()
+        results.append(written)
+
+
+def _put(work_queue, item, writer_threads):
+    """Queues item for the writers; returns False instead of blocking forever once none is left."""
+    while True:
+        try:
+            work_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if not any(thread.is_alive() for thread in writer_threads):
+                return False
+
+
+def parallel_seed(csv_filepath, parse_workers=None, writers=4, shard_bytes=DEFAULT_SHARD_BYTES,
+                  rows_per_statement=DEFAULT_ROWS_PER_STATEMENT):
+    """
+    Parallel seeding pipeline for user_data:
+    - the CSV is split into byte-range shards,
+    - a process pool parses and validates the shards,
+    - `writers` threads, each with its own connection, insert the parsed rows
+      with multi-row VALUES statements.
+    At most two shards per parser are in flight, so memory stays bounded
+    regardless of file size. Returns the number of rows sent to the database.
+
+    If a writer fails, no further shards are parsed, the other writers
+    finish the shards already queued, and a RuntimeError reports how many
+    rows were written before the failure. The load can simply be re-run:
+    rows already present are ignored.
+    """
+    if not isinstance(writers, int) or writers <= 0:
+        print("Number of writers must be a positive integer.")
+        return 0
+
+    try:
+        shards = split_into_shards(csv_filepath, shard_bytes)
+    except OSError:
+        print(f"Error: CSV file not found at {csv_filepath}")
+        return 0
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    work_queue = queue.Queue(maxsize=writers * 2) # Back-pressure on the parsers
+    results = []
+    errors = []
+    abort = threading.Event()
+
+    writer_threads = [
+        threading.Thread(target=writer, args=(work_queue, rows_per_statement, results, errors, abort),
+                         daemon=True)
+        for _ in range(writers)
+    ]
+    for thread in writer_threads:
+        thread.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            pending = set()
+            next_shard = 0
+            max_in_flight = parse_workers * 2
+
+            while (next_shard < len(shards) or pending) and not abort.is_set():
+                # Keep the parsers busy without parsing the whole file ahead of the writers
+                while next_shard < len(shards) and len(pending) < max_in_flight:
+                    start, end = shards[next_shard]
+                    pending.add(pool.submit(parse_shard, csv_filepath, start, end))
+                    next_shard += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows = future.result()
+                    if rows and not abort.is_set():
+                        _put(work_queue, rows, writer_threads)
+            for future in pending:
+                future.cancel()
+    finally:
+        for _ in writer_threads:
+            if not _put(work_queue, _STOP, writer_threads):
+                break
+        for thread in writer_threads:
+            thread.join()
+
+    inserted = sum(results)
+    if errors:
+        for e in errors:
+            print(f"Error inserting data: {e}")
+        raise RuntimeError(
+            f"Seeding {csv_filepath} stopped after {inserted} rows: {len(errors)} writer(s) failed."
+        ) from errors[0]
+
+    print(f"Inserted/Ignored {inserted} rows from {csv_filepath} "
+          f"using {parse_workers} parsers and {writers} writers.")
+    return inserted
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import close_cursor, get_pool
+
+# user_id is a lowercase UUID string, so ranges are cut on its leading hex digits
+PREFIX_DIGITS = 4
+PREFIX_SPACE = 16 ** PREFIX_DIGITS
+
+# Batches each partition may queue ahead of the consumer
+DEFAULT_PREFETCH = 2
+
+_PARTITION_DONE = object()
+
+
+class _ScanError:
+    """Carries an exception from a scanning thread to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def uuid_prefix_ranges(partitions):
+    """
+    Splits the user_id key space into `partitions` contiguous ranges of
+    UUID prefixes. Returns (low, high) pairs meaning low <= user_id < high;
+    None stands for an open end, so together the ranges cover every key.
+    """
+    if not isinstance(partitions, int) or partitions <= 0:
+        raise ValueError("partitions must be a positive integer.")
+    if partitions > PREFIX_SPACE:
+        raise ValueError(f"At most {PREFIX_SPACE} partitions are supported.")
+
+    boundaries = [format(PREFIX_SPACE * i // partitions, f"0{PREFIX_DIGITS}x") for i in range(1, partitions)]
+    lows = [None] + boundaries
+    highs = boundaries + [None]
+    return list(zip(lows, highs))
+
+
+def partition_query(low, high):
+    """Builds the ordered SELECT for one key range, with its parameters."""
+    clauses = []
+    params = []
+    if low is not None:
+        clauses.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        clauses.append("user_id < %s")
+        params.append(high)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return "SELECT user_id, name, email, age FROM user_data" + where + " ORDER BY user_id", params
+
+
+def _scan_partition(pool, low, high, batch_size, dictionary, out, stop):
+    """
+    Runs in a worker thread: streams one key range on its own pooled
+    connection and puts its batches on `out`, blocking while `out` is full.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        with pool.connection() as connection:
+            cursor = connection.cursor(dictionary=dictionary, buffered=False)
+            try:
+                query, params = partition_query(low, high)
+                cursor.execute(query, params)
+                while not stop.is_set():
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    if not put(batch):
+                        return
+            finally:
+                close_cursor(cursor)
+        put(_PARTITION_DONE)
+    except BaseException as e:
+        put(_ScanError(e))
+
+
+def partitioned_scan(partitions=8, workers=None, ordered=False, batch_size=1000,
+                     prefetch=DEFAULT_PREFETCH, dictionary=True):
+    """
+    Generator that scans all of user_data by splitting it into `partitions`
+    user_id prefix ranges and reading them concurrently, one pooled
+    connection per worker thread, and yields the rows as one stream.
+
+    ordered=True yields rows in user_id order (partition by partition, each
+    ordered by key); other partitions keep fetching into their bounded
+    queues meanwhile. ordered=False yields batches as soon as any partition
+    produces them, which keeps every worker busy.
+
+    workers defaults to min(partitions, pool size). Errors in a worker are
+    raised in the consumer; closing the generator early stops all workers.
+    """
+    ranges = uuid_prefix_ranges(partitions)
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer.")
+    if not isinstance(prefetch, int) or prefetch <= 0:
+        raise ValueError("prefetch must be a positive integer.")
+
+    pool = get_pool()
+    workers = workers or min(partitions, pool.max_size)
+    stop = threading.Event()
+
+    if ordered:
+        # One queue per partition so they can be drained in key order
+        queues = [queue.Queue(maxsize=prefetch) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=prefetch * workers)
+        queues = [shared] * len(ranges)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="partitioned-scan")
+    try:
+        # Submitted in key order, so with ordered=True the partition being
+        # drained has always been started before the ones after it
+        for (low, high), out in zip(ranges, queues):
+            executor.submit(_scan_partition, pool, low, high, batch_size, dictionary, out, stop)
+
+        if ordered:
+            for partition_queue in queues:
+                while True:
+                    item = partition_queue.get()
+                    if item is _PARTITION_DONE:
+                        break
+                    if isinstance(item, _ScanError):
+                        raise item.error
+                    yield from item
+        else:
+            remaining = len(ranges)
+            while remaining:
+                item = shared.get()
+                if item is _PARTITION_DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(item, _ScanError):
+                    raise item.error
+                yield from item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
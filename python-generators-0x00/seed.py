@@ -2,8 +2,12 @@
 
 import mysql.connector
 import csv
+import json
+import os
 import uuid # Though we read UUIDs from CSV, useful for general handling
 
+import connection_pool # Shared pool used by the streaming generators
+
 # Database connection parameters
 # !!! IMPORTANT: Replace with your actual MySQL credentials !!!
 DB_HOST = "localhost"
@@ -43,14 +47,18 @@ def create_database(connection):
         if 'cursor' in locals() and cursor is not None:
             cursor.close()
 
-def connect_to_prodev():
-    """Connects to the ALX_prodev database in MySQL."""
+def connect_to_prodev(allow_local_infile=False):
+    """
+    Connects to the ALX_prodev database in MySQL.
+    allow_local_infile=True is needed for the LOAD DATA LOCAL INFILE fast path.
+    """
     try:
         connection = mysql.connector.connect(
             host=DB_HOST,
             user=DB_USER,
             password=DB_PASSWORD,
-            database=DB_NAME # Specify the database
+            database=DB_NAME, # Specify the database
+            allow_local_infile=allow_local_infile
         )
         print(f"Connected to database {DB_NAME}.")
         return connection
@@ -136,20 +144,234 @@ def insert_data(connection, csv_filepath):
             cursor.close()
 
 
+# --- Streaming ingestion ---
+
+INSERT_SQL = "INSERT IGNORE INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
+
+def parse_user_row(row):
+    """
+    Converts one CSV record into an insertable tuple.
+    Returns None (after printing why) if the record is malformed.
+    """
+    try:
+        return (row[0], row[1], row[2], int(row[3]))
+    except (ValueError, IndexError) as e:
+        print(f"Skipping row due to data error: {row} - {e}")
+        return None
+
+def iter_csv_rows(csv_filepath, start_offset=0):
+    """
+    Generator that reads the CSV lazily and yields (record, end_offset) pairs,
+    where end_offset is the byte position just after the record.
+    Starting at offset 0 skips the header; any other offset must be one
+    previously yielded (e.g. from a checkpoint) and resumes right there.
+    """
+    with open(csv_filepath, mode='rb') as csvfile:
+        csvfile.seek(start_offset)
+        position = start_offset
+
+        def lines():
+            # Feed csv.reader one line at a time while tracking the byte offset.
+            # csv.reader never reads ahead, so after it yields a record the
+            # offset points exactly at the start of the next one.
+            nonlocal position
+            for raw_line in csvfile:
+                position += len(raw_line)
+                yield raw_line.decode('utf-8')
+
+        reader = csv.reader(lines())
+        if start_offset == 0:
+            next(reader, None) # Skip the header row
+
+        for record in reader:
+            yield record, position
+
+def read_checkpoint(checkpoint_path, csv_filepath):
+    """Returns the saved checkpoint for csv_filepath, or None if there is none."""
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, mode='r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return None
+    if checkpoint.get('csv_filepath') != os.path.abspath(csv_filepath):
+        print(f"Checkpoint {checkpoint_path} belongs to another file, starting from the beginning.")
+        return None
+    return checkpoint
+
+def write_checkpoint(checkpoint_path, csv_filepath, offset, rows_done):
+    """Atomically records how far the load got (write to a temp file, then rename)."""
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, mode='w', encoding='utf-8') as f:
+        json.dump({
+            'csv_filepath': os.path.abspath(csv_filepath),
+            'offset': offset,
+            'rows_done': rows_done,
+        }, f)
+    os.replace(temp_path, checkpoint_path)
+
+def print_progress(rows_done, bytes_done, total_bytes):
+    """Default progress reporter used by insert_data_streaming."""
+    percent = (100.0 * bytes_done / total_bytes) if total_bytes else 100.0
+    print(f"Committed {rows_done} rows ({percent:.1f}% of file).")
+
+def insert_data_streaming(connection, csv_filepath, chunk_size=1000, checkpoint_path=None,
+                          on_progress=print_progress):
+    """
+    Inserts data from a CSV file into user_data without loading the file into memory.
+    Rows are read lazily and committed every chunk_size rows, so each
+    transaction stays small. After every commit on_progress(rows_done,
+    bytes_done, total_bytes) is called and, if checkpoint_path is given, the
+    byte offset is saved there; rerunning with the same checkpoint_path after
+    an interruption resumes from the last committed chunk. The checkpoint
+    file is removed once the load completes.
+    Returns the number of rows sent to the database.
+    """
+    if connection is None:
+        print("Database connection is not valid.")
+        return 0
+
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        print("Chunk size must be a positive integer.")
+        return 0
+
+    try:
+        total_bytes = os.path.getsize(csv_filepath)
+    except OSError:
+        print(f"Error: CSV file not found at {csv_filepath}")
+        return 0
+
+    start_offset = 0
+    rows_done = 0
+    checkpoint = read_checkpoint(checkpoint_path, csv_filepath)
+    if checkpoint is not None:
+        start_offset = checkpoint['offset']
+        rows_done = checkpoint['rows_done']
+        print(f"Resuming load of {csv_filepath} at byte {start_offset} ({rows_done} rows already committed).")
+
+    cursor = None
+    chunk = []
+    offset = start_offset
+    try:
+        cursor = connection.cursor()
+
+        def flush():
+            nonlocal rows_done
+            cursor.executemany(INSERT_SQL, chunk)
+            connection.commit()
+            rows_done += len(chunk)
+            chunk.clear()
+            if checkpoint_path is not None:
+                write_checkpoint(checkpoint_path, csv_filepath, offset, rows_done)
+            if on_progress is not None:
+                on_progress(rows_done, offset, total_bytes)
+
+        for record, offset in iter_csv_rows(csv_filepath, start_offset):
+            processed_row = parse_user_row(record)
+            if processed_row is not None:
+                chunk.append(processed_row)
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+    except mysql.connector.Error as err:
+        print(f"Error inserting data: {err}")
+        connection.rollback() # Only the current chunk is lost; the checkpoint still points before it
+        return rows_done
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"Error during streaming load: {e}")
+        return rows_done
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path) # Load finished, nothing to resume
+    print(f"Inserted/Ignored {rows_done} rows from {csv_filepath}.")
+    return rows_done
+
+def local_infile_enabled(connection):
+    """Checks whether the server accepts LOAD DATA LOCAL INFILE."""
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW VARIABLES LIKE 'local_infile'")
+        row = cursor.fetchone()
+        return row is not None and str(row[1]).upper() in ("ON", "1")
+    except mysql.connector.Error:
+        return False
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+def bulk_load_data(connection, csv_filepath):
+    """
+    Fast path: lets the server parse and insert the whole CSV with
+    LOAD DATA LOCAL INFILE. The connection must have been opened with
+    connect_to_prodev(allow_local_infile=True) and the server must have
+    local_infile enabled. Returns the number of rows loaded, or None if the
+    fast path is unavailable or failed (nothing is committed in that case).
+    """
+    if connection is None:
+        print("Database connection is not valid.")
+        return None
+
+    if not local_infile_enabled(connection):
+        print("Server does not allow LOAD DATA LOCAL INFILE.")
+        return None
+
+    load_sql = (
+        "LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+        "(user_id, name, email, age)"
+    )
+
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute(load_sql, (os.path.abspath(csv_filepath),))
+        connection.commit()
+        print(f"Bulk loaded {cursor.rowcount} rows from {csv_filepath}.")
+        return cursor.rowcount
+    except mysql.connector.Error as err:
+        print(f"Bulk load failed: {err}")
+        connection.rollback()
+        return None
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+def load_data(connection, csv_filepath, chunk_size=1000, checkpoint_path=None, prefer_bulk=True):
+    """
+    Loads the CSV with the LOAD DATA fast path when the server allows it,
+    otherwise falls back to insert_data_streaming. A resumable load
+    (checkpoint_path given) always uses the streaming path.
+    Returns the number of rows loaded.
+    """
+    if prefer_bulk and checkpoint_path is None:
+        loaded = bulk_load_data(connection, csv_filepath)
+        if loaded is not None:
+            return loaded
+    return insert_data_streaming(connection, csv_filepath, chunk_size, checkpoint_path)
+
+
 # --- Generator Function ---
 
 def stream_users_from_db():
     """
     Generator function to stream rows from the user_data table one by one.
-    Connects to the ALX_prodev database and yields rows as dictionaries.
+    Checks a connection out of the shared pool and yields rows as dictionaries.
     """
+    pool = connection_pool.get_pool()
     connection = None # Initialize connection outside try block
     try:
-        # Connect to the database
-        connection = connect_to_prodev()
-        if connection is None:
-            print("Failed to connect to database for streaming.")
-            return # Exit the generator if connection fails
+        # Check a connection out of the pool
+        connection = pool.checkout()
 
         # Use a cursor with buffered=False (default for large queries)
         # Dictionary=True to get results as dictionaries
@@ -174,10 +396,10 @@ def stream_users_from_db():
         print(f"An unexpected error occurred during streaming: {e}")
         # Catch other potential errors
     finally:
-        # Ensure the connection is closed
-        if connection is not None and connection.is_connected():
-            connection.close()
-            print("Database connection closed.")
+        # Ensure the connection goes back to the pool
+        if connection is not None:
+            pool.checkin(connection)
+            print("Database connection returned to pool.")
 
 
 if __name__ == "__main__":
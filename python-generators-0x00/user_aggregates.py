@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+
+import math
+from collections import Counter
+
+import mysql.connector
+
+# Connections come from the shared pool (credentials live in seed.py)
+from connection_pool import close_cursor, get_pool
+
+# Columns of user_data that can be aggregated numerically
+NUMERIC_COLUMNS = ("age",)
+METRICS = ("count", "sum", "mean", "min", "max")
+# Rows pulled per round trip by the streaming fallback
+FETCH_BLOCK_SIZE = 10000
+
+
+def aggregate_user_data(column="age", metrics=METRICS, bucket_width=None, percentiles=(),
+                        pushdown=True):
+    """
+    Computes summary statistics over a numeric column of user_data.
+
+    metrics      any of "count", "sum", "mean", "min", "max"
+    bucket_width if given, also returns a histogram as (low, high, count)
+                 tuples for buckets [low, high) of that width
+    percentiles  e.g. (50, 90, 99); linearly interpolated between ranks
+
+    With pushdown=True the work is done by MySQL (aggregate functions,
+    GROUP BY for histograms and an ordered value/frequency table for
+    percentiles), so only a handful of rows cross the wire. If the pushed
+    down query fails, or pushdown=False, the column is streamed as plain
+    tuples in large fetchmany blocks and accumulated in Python instead.
+
+    Returns a dict with the requested keys plus 'pushed_down' telling which
+    path produced the result.
+    """
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Cannot aggregate column {column!r}; choose from {NUMERIC_COLUMNS}.")
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {sorted(unknown)}; choose from {METRICS}.")
+    if bucket_width is not None and bucket_width <= 0:
+        raise ValueError("bucket_width must be positive.")
+    for p in percentiles:
+        if not 0 <= p <= 100:
+            raise ValueError(f"Percentile {p} is outside 0-100.")
+
+    pool = get_pool()
+    with pool.connection() as connection:
+        if pushdown:
+            try:
+                return _aggregate_in_sql(connection, column, metrics, bucket_width, percentiles)
+            except mysql.connector.Error as err:
+                print(f"Aggregation pushdown failed ({err}), falling back to streaming.")
+                connection.rollback()
+        return _aggregate_streaming(connection, column, metrics, bucket_width, percentiles)
+
+
+def _aggregate_in_sql(connection, column, metrics, bucket_width, percentiles):
+    """Runs every requested aggregate on the server."""
+    result = {'pushed_down': True}
+    cursor = connection.cursor()
+    try:
+        # column is validated against NUMERIC_COLUMNS, so it is safe to format in
+        cursor.execute(
+            f"SELECT COUNT({column}), SUM({column}), AVG({column}), MIN({column}), MAX({column}) "
+            f"FROM user_data"
+        )
+        count, total, mean, low, high = cursor.fetchone()
+        values = {
+            'count': count,
+            'sum': _to_number(total) if count else 0,
+            'mean': float(mean) if count else None,
+            'min': _to_number(low),
+            'max': _to_number(high),
+        }
+        for metric in metrics:
+            result[metric] = values[metric]
+
+        if bucket_width is not None:
+            cursor.execute(
+                f"SELECT FLOOR({column} / %s) AS bucket, COUNT(*) FROM user_data "
+                f"GROUP BY bucket ORDER BY bucket",
+                (bucket_width,)
+            )
+            result['histogram'] = [
+                (int(bucket) * bucket_width, (int(bucket) + 1) * bucket_width, bucket_count)
+                for bucket, bucket_count in cursor.fetchall()
+            ]
+
+        if percentiles:
+            # One row per distinct value: tiny for a column like age
+            cursor.execute(
+                f"SELECT {column}, COUNT(*) FROM user_data GROUP BY {column} ORDER BY {column}"
+            )
+            frequencies = [(_to_number(value), value_count) for value, value_count in cursor.fetchall()]
+            result['percentiles'] = _percentiles_from_frequencies(frequencies, count, percentiles)
+    finally:
+        cursor.close()
+    return result
+
+
+def _aggregate_streaming(connection, column, metrics, bucket_width, percentiles):
+    """
+    Fallback accumulator: streams the column as plain tuples in
+    FETCH_BLOCK_SIZE blocks and folds each block with built-ins
+    (sum/min/max/Counter.update), which run in C rather than per row in Python.
+    """
+    count = 0
+    total = 0
+    low = None
+    high = None
+    frequencies = Counter() # value -> occurrences, feeds histogram and percentiles
+    need_frequencies = bucket_width is not None or bool(percentiles)
+
+    cursor = connection.cursor(buffered=False)
+    try:
+        # DECIMAL(5,0) is integral, so casting lets the driver hand back ints instead of Decimals
+        cursor.execute(f"SELECT CAST({column} AS SIGNED) FROM user_data")
+        while True:
+            block = cursor.fetchmany(FETCH_BLOCK_SIZE)
+            if not block:
+                break
+            values = [row[0] for row in block]
+            count += len(values)
+            total += sum(values)
+            block_low = min(values)
+            block_high = max(values)
+            low = block_low if low is None else min(low, block_low)
+            high = block_high if high is None else max(high, block_high)
+            if need_frequencies:
+                frequencies.update(values)
+    finally:
+        close_cursor(cursor)
+
+    values = {
+        'count': count,
+        'sum': total,
+        'mean': (total / count) if count else None,
+        'min': low,
+        'max': high,
+    }
+    result = {'pushed_down': False}
+    for metric in metrics:
+        result[metric] = values[metric]
+
+    if bucket_width is not None:
+        buckets = Counter()
+        for value, value_count in frequencies.items():
+            buckets[math.floor(value / bucket_width)] += value_count
+        result['histogram'] = [
+            (bucket * bucket_width, (bucket + 1) * bucket_width, buckets[bucket])
+            for bucket in sorted(buckets)
+        ]
+
+    if percentiles:
+        result['percentiles'] = _percentiles_from_frequencies(sorted(frequencies.items()), count, percentiles)
+
+    return result
+
+
+def _percentiles_from_frequencies(frequencies, count, percentiles):
+    """
+    Computes linearly interpolated percentiles (same definition as
+    numpy.percentile's default) from an ascending (value, occurrences) list.
+    """
+    if not count:
+        return {p: None for p in percentiles}
+
+    def value_at(rank):
+        # Value of the rank-th smallest element (0-based)
+        seen = 0
+        for value, value_count in frequencies:
+            seen += value_count
+            if rank < seen:
+                return value
+        return frequencies[-1][0]
+
+    result = {}
+    for p in percentiles:
+        position = (count - 1) * p / 100.0
+        below = math.floor(position)
+        fraction = position - below
+        low_value = value_at(below)
+        if fraction == 0:
+            result[p] = float(low_value)
+        else:
+            high_value = value_at(below + 1)
+            result[p] = float(low_value + (high_value - low_value) * fraction)
+    return result
+
+
+def _to_number(value):
+    """Turns MySQL DECIMAL results into int (when integral) or float."""
+    if value is None:
+        return None
+    as_float = float(value)
+    return int(as_float) if as_float.is_integer() else as_float
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+import re
+
+from user_rows import USER_COLUMNS
+
+# Operators MySQL evaluates for us. Each maps to a WHERE fragment where {}
+# is the column name; values are always sent as bound parameters.
+SQL_OPERATORS = {
+    "=": "{} = %s",
+    "!=": "{} <> %s",
+    "<": "{} < %s",
+    "<=": "{} <= %s",
+    ">": "{} > %s",
+    ">=": "{} >= %s",
+    "like": "{} LIKE %s",
+    "between": "{} BETWEEN %s AND %s",
+    "in": "{} IN ({})",
+    "not in": "{} NOT IN ({})",
+}
+
+# Operators only Python can evaluate faithfully (MySQL's REGEXP dialect
+# differs from Python's re module)
+PYTHON_OPERATORS = {
+    "regex": lambda value, pattern: value is not None and re.search(pattern, str(value)) is not None,
+}
+
+
+def compile_filters(filters):
+    """
+    Compiles declarative filters into a parameterized WHERE clause.
+
+    filters is a list of (column, operator, value) tuples that are AND-ed
+    together. operator is one of SQL_OPERATORS (pushed down to MySQL), one of
+    PYTHON_OPERATORS, or any callable f(row_value, value) -> bool; the last
+    two are evaluated in Python on the rows MySQL sends back.
+
+    Returns (where_sql, params, python_predicates) where where_sql is ""
+    when nothing could be pushed down and python_predicates is a list of
+    (column, function, value) tuples still to apply.
+    """
+    clauses = []
+    params = []
+    python_predicates = []
+
+    for column, op, value in filters or ():
+        if column not in USER_COLUMNS:
+            raise ValueError(f"Unknown column {column!r}; choose from {USER_COLUMNS}.")
+
+        if callable(op):
+            python_predicates.append((column, op, value))
+            continue
+
+        key = op.lower()
+        if key in PYTHON_OPERATORS:
+            python_predicates.append((column, PYTHON_OPERATORS[key], value))
+        elif key in ("in", "not in"):
+            values = list(value)
+            if not values:
+                # Nothing can be IN an empty set; everything is NOT IN it
+                clauses.append("1 = 0" if key == "in" else "1 = 1")
+                continue
+            placeholders = ", ".join(["%s"] * len(values))
+            clauses.append(SQL_OPERATORS[key].format(column, placeholders))
+            params.extend(values)
+        elif key == "between":
+            low, high = value
+            clauses.append(SQL_OPERATORS[key].format(column))
+            params.extend([low, high])
+        elif key in SQL_OPERATORS:
+            clauses.append(SQL_OPERATORS[key].format(column))
+            params.append(value)
+        else:
+            raise ValueError(f"Unknown operator {op!r}.")
+
+    where_sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where_sql, params, python_predicates
+
+
+def row_matches(row, python_predicates, get_value):
+    """
+    Applies the Python-side predicates to one row.
+    get_value(row, column) reads a column from whatever row format is in use.
+    """
+    for column, function, value in python_predicates:
+        if not function(get_value(row, column), value):
+            return False
+    return True
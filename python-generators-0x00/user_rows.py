@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+from array import array
+
+# Column order used by every compact row format
+USER_COLUMNS = ("user_id", "name", "email", "age")
+# Formats understood by stream_users_in_batches
+ROW_FORMATS = ("dict", "tuple", "record", "columnar")
+
+
+# UserColumns attribute holding each column
+_COLUMN_ATTRIBUTES = {"user_id": "user_ids", "name": "names", "email": "emails", "age": "ages"}
+_TUPLE_INDEX = {column: i for i, column in enumerate(USER_COLUMNS)}
+
+
+def value_getter(row_format):
+    """
+    Returns a function (row, column) -> value for rows in the given
+    (non-columnar) format, so callers can read rows without caring about
+    their representation.
+    """
+    if row_format == "dict":
+        return lambda row, column: row.get(column)
+    if row_format == "tuple":
+        return lambda row, column: row[_TUPLE_INDEX[column]]
+    if row_format == "record":
+        return getattr
+    raise ValueError(f"No per-row accessor for row format {row_format!r}.")
+
+
+class UserRecord:
+    """
+    Compact user_data row. __slots__ avoids the per-instance __dict__, so a
+    record costs a fraction of the memory of the equivalent dictionary.
+    """
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, user_id, name, email, age):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    @classmethod
+    def from_tuple(cls, row):
+        return cls(row[0], row[1], row[2], row[3])
+
+    def as_dict(self):
+        """Returns the same dictionary a dictionary=True cursor would."""
+        return {column: getattr(self, column) for column in USER_COLUMNS}
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return all(getattr(self, column) == getattr(other, column) for column in USER_COLUMNS)
+
+    def __repr__(self):
+        return (f"UserRecord(user_id={self.user_id!r}, name={self.name!r}, "
+                f"email={self.email!r}, age={self.age!r})")
+
+
+class UserColumns:
+    """
+    Columnar batch of user_data rows: one list per text column and a typed
+    array of ages. Filters on age scan a single contiguous array instead of
+    touching one object per row.
+    """
+    __slots__ = ("user_ids", "names", "emails", "ages")
+
+    def __init__(self, user_ids, names, emails, ages):
+        self.user_ids = user_ids
+        self.names = names
+        self.emails = emails
+        self.ages = ages
+
+    @classmethod
+    def from_tuples(cls, rows):
+        """Transposes (user_id, name, email, age) tuples into columns."""
+        if not rows:
+            return cls([], [], [], array('q'))
+        user_ids, names, emails, ages = zip(*rows)
+        return cls(list(user_ids), list(names), list(emails), array('q', ages))
+
+    def __len__(self):
+        return len(self.ages)
+
+    def column(self, name):
+        """Returns the list/array holding column `name`."""
+        return getattr(self, _COLUMN_ATTRIBUTES[name])
+
+    def indices_where(self, column, predicate):
+        """Returns the positions whose value in column satisfies predicate(value)."""
+        return [i for i, value in enumerate(self.column(column)) if predicate(value)]
+
+    def take(self, indices):
+        """Returns a new UserColumns holding only the rows at indices."""
+        return UserColumns(
+            [self.user_ids[i] for i in indices],
+            [self.names[i] for i in indices],
+            [self.emails[i] for i in indices],
+            array('q', (self.ages[i] for i in indices)),
+        )
+
+    def records(self):
+        """Yields one UserRecord per row."""
+        for row in zip(self.user_ids, self.names, self.emails, self.ages):
+            yield UserRecord.from_tuple(row)
+
+    def __repr__(self):
+        return f"UserColumns({len(self)} rows)"